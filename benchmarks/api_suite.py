@@ -0,0 +1,342 @@
+"""
+Benchmark suite: latency and throughput of the main API endpoints.
+
+Seeds a throwaway SQLite database with --users users, each owning --goals goals
+of --tasks tasks, then drives the real application with --concurrency clients
+through these scenarios, one after another:
+
+- login:      POST /auth/login (bcrypt at --bcrypt-rounds)
+- goals:      GET /planner/goals
+- goal_tasks: GET /planner/goal/{id}/tasks
+- toggle:     PATCH /planner/task/{id}/toggle, flipping a task each time
+- ask_ai:     POST /planner/ask_ai with the stub AI backend (AI_BACKEND=stub),
+              answering after --ai-latency-ms; every title is new, so the plan
+              cache never answers
+
+The app runs in-process over httpx's ASGI transport (--mode inprocess, the
+default) or as a uvicorn server in a child process, reached over TCP
+(--mode uvicorn). Each scenario reports p50/p95/p99 latency, mean latency,
+requests per second and non-2xx responses. Runs are reproducible for a given
+--seed, apart from timing noise.
+
+Results can be saved as a baseline and later runs compared against it; the
+comparison exits with status 1 if any scenario's p95 latency or throughput is
+worse than the baseline by more than --tolerance:
+
+    python -m benchmarks.api_suite --save-baseline bench_baseline.json
+    # ...change something...
+    python -m benchmarks.api_suite --baseline bench_baseline.json
+
+Usage:
+    python -m benchmarks.api_suite [--mode inprocess|uvicorn] [--scenarios a,b]
+        [--users N] [--goals N] [--tasks N] [--requests N] [--concurrency N]
+        [--warmup N] [--seed N] [--bcrypt-rounds N] [--ai-latency-ms MS]
+        [--workers N] [--save-baseline PATH] [--baseline PATH] [--tolerance F]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCENARIOS = ("login", "goals", "goal_tasks", "toggle", "ask_ai")
+PASSWORD = "benchmark-password"
+
+
+def configure_environment(args) -> None:
+    """Point the application at a fresh database and benchmark settings; call before importing server."""
+    db_dir = tempfile.mkdtemp(prefix="api-suite-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_dir}/bench.db"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["AI_BACKEND"] = "stub"
+    os.environ["AI_STUB_LATENCY_MS"] = str(args.ai_latency_ms)
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ["ASSETS_BUILD_DIR"] = f"{db_dir}/assets"
+
+
+def seed(args) -> list:
+    """
+    Create users with goals and tasks in bulk.
+
+    Returns:
+        One dict per user: email, token, goal_ids and task_ids
+    """
+    from sqlalchemy import insert
+
+    from server.apps.authentication.models import User
+    from server.apps.planner.models import Goal, Task
+    from server.core.database import SessionLocal, create_db_and_tables
+    from server.core.hashing import pwd_context
+    from server.core.security import create_access_token
+
+    create_db_and_tables()
+    rng = random.Random(args.seed)
+    # Every user shares one password, so bcrypt runs once while seeding
+    hashed = pwd_context.handler("bcrypt").using(rounds=args.bcrypt_rounds).hash(PASSWORD)
+    users, user_rows, goal_rows, task_rows = [], [], [], []
+    for user_index in range(args.users):
+        user_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        email = f"bench{user_index}@example.com"
+        user_rows.append({"id": user_id, "first_name": "Bench", "last_name": str(user_index),
+                          "email": email, "hashed_password": hashed})
+        goal_ids, task_ids = [], []
+        for goal_index in range(args.goals):
+            goal_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+            goal_ids.append(goal_id)
+            completed = 0
+            for task_index in range(args.tasks):
+                task_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+                done = rng.random() < 0.5
+                completed += done
+                task_ids.append(task_id)
+                task_rows.append({"id": task_id, "title": f"Task {task_index}", "completed": done,
+                                  "goal_id": goal_id})
+            goal_rows.append({"id": goal_id, "title": f"Goal {goal_index}", "description": "Benchmark goal",
+                              "completed": args.tasks > 0 and completed == args.tasks, "user_id": user_id,
+                              "total_tasks": args.tasks, "completed_tasks": completed})
+        users.append({"email": email, "token": create_access_token({"sub": email}),
+                      "goal_ids": goal_ids, "task_ids": task_ids})
+
+    with SessionLocal() as db:
+        db.execute(insert(User), user_rows)
+        if goal_rows:
+            db.execute(insert(Goal), goal_rows)
+        if task_rows:
+            db.execute(insert(Task), task_rows)
+        db.commit()
+    return users
+
+
+def request_factory(name: str, users: list, rng: random.Random):
+    """
+    Build the function that describes a scenario's n-th request.
+
+    Returns:
+        Function of the request number returning (method, url, httpx keyword arguments)
+    """
+    toggled = {}
+
+    def auth(user):
+        return {"Authorization": f"Bearer {user['token']}"}
+
+    def login(_):
+        user = rng.choice(users)
+        return "POST", "/auth/login", {"data": {"username": user["email"], "password": PASSWORD}}
+
+    def goals(_):
+        return "GET", "/planner/goals", {"headers": auth(rng.choice(users))}
+
+    def goal_tasks(_):
+        user = rng.choice(users)
+        return "GET", f"/planner/goal/{rng.choice(user['goal_ids'])}/tasks", {"headers": auth(user)}
+
+    def toggle(_):
+        user = rng.choice(users)
+        task_id = rng.choice(user["task_ids"])
+        # Alternate the target state so every toggle really changes the task
+        toggled[task_id] = not toggled.get(task_id, False)
+        return "PATCH", f"/planner/task/{task_id}/toggle", {
+            "headers": auth(user), "json": {"completed": toggled[task_id]}
+        }
+
+    def ask_ai(number):
+        user = rng.choice(users)
+        return "POST", "/planner/ask_ai", {
+            "headers": auth(user), "json": {"goal_title": f"Benchmark goal {number} {rng.random():.6f}"}
+        }
+
+    return {"login": login, "goals": goals, "goal_tasks": goal_tasks, "toggle": toggle, "ask_ai": ask_ai}[name]
+
+
+def summarize(latencies: list, elapsed: float, statuses: Counter) -> dict:
+    """Turn per-request latencies (seconds) into the reported statistics (milliseconds)."""
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "errors": sum(count for status, count in statuses.items() if not 200 <= status < 300),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, requests: int, concurrency: int,
+                       warmup: int) -> dict:
+    """Send warmup requests, then time requests spread over concurrency workers."""
+    for number in range(warmup):
+        method, url, kwargs = make_request(-1 - number)
+        await client.request(method, url, **kwargs)
+
+    numbers = iter(range(requests))
+    latencies, statuses = [], Counter()
+
+    async def worker():
+        for number in numbers:
+            method, url, kwargs = make_request(number)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, statuses)
+
+
+async def run_all(client: httpx.AsyncClient, args, users: list) -> dict:
+    results = {}
+    for name in args.scenarios:
+        rng = random.Random(f"{args.seed}-{name}")
+        results[name] = await run_scenario(
+            client, request_factory(name, users, rng), args.requests, args.concurrency, args.warmup
+        )
+        print(f"  {name}: done", file=sys.stderr)
+    return results
+
+
+async def run_inprocess(args, users: list) -> dict:
+    from server.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await run_all(client, args, users)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(args, users: list) -> dict:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=os.environ.copy()
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    if (await client.get("/api/health-check")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                await asyncio.sleep(0.2)
+            return await run_all(client, args, users)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Print each scenario's change against the baseline.
+
+    Returns:
+        True if no scenario regressed beyond the tolerance
+    """
+    ok = True
+    print(f"\ncompared with baseline (tolerance {tolerance:.0%})")
+    print(f"{'scenario':<12}{'p50':>10}{'p95':>10}{'p99':>10}{'rps':>10}  verdict")
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            print(f"{name:<12}{'not in baseline':>40}")
+            continue
+
+        def change(key):
+            return (current[key] - before[key]) / before[key] if before[key] else 0.0
+
+        regressed = change("p95_ms") > tolerance or -change("rps") > tolerance
+        ok = ok and not regressed
+        print(f"{name:<12}{change('p50_ms'):>+10.1%}{change('p95_ms'):>+10.1%}{change('p99_ms'):>+10.1%}"
+              f"{change('rps'):>+10.1%}  {'REGRESSED' if regressed else 'ok'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and throughput of the main API endpoints.")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--goals", type=int, default=20, help="goals per user")
+    parser.add_argument("--tasks", type=int, default=10, help="tasks per goal")
+    parser.add_argument("--requests", type=int, default=300, help="timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per scenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--ai-latency-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--save-baseline", type=Path, help="write the results here as the new baseline")
+    parser.add_argument("--baseline", type=Path, help="compare against this baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative p95 increase or throughput drop (default 0.10)")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.users < 1 or args.goals < 1 or args.tasks < 1:
+        parser.error("--users, --goals and --tasks must be at least 1")
+
+    configure_environment(args)
+    users = seed(args)
+    runner = run_uvicorn if args.mode == "uvicorn" else run_inprocess
+    results = asyncio.run(runner(args, users))
+
+    print(f"mode={args.mode} users={args.users} goals/user={args.goals} tasks/goal={args.tasks} "
+          f"requests={args.requests} concurrency={args.concurrency} seed={args.seed}")
+    print(f"{'scenario':<12}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'mean ms':>9}{'req/s':>9}{'errors':>8}")
+    for name, result in results.items():
+        print(f"{name:<12}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+              f"{result['mean_ms']:>9.1f}{result['rps']:>9.1f}{result['errors']:>8}")
+
+    run = {
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("save_baseline", "baseline", "tolerance")},
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(run, indent=2, default=str) + "\n")
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        differing = sorted(key for key, value in run["config"].items()
+                           if json.dumps(baseline.get("config", {}).get(key), default=str)
+                           != json.dumps(value, default=str))
+        if differing:
+            print(f"warning: baseline was recorded with different settings: {', '.join(differing)}")
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Load test: async vs sync database path for the goal listing.
+
+Seeds a throwaway SQLite database, then drives the app in-process with many
+concurrent clients against two equivalent endpoints: the real async
+/planner/goals, and a sync copy of it that uses the blocking engine and runs on
+FastAPI's threadpool. Each simulated request also waits --io-latency-ms inside
+the handler, standing in for the network round trip a real database adds; the
+sync copy holds a threadpool thread for that wait, the async one does not, so
+the sync path tops out near threadpool size / latency requests per second.
+
+Usage:
+    python -m benchmarks.async_load [--concurrency N] [--requests N] [--io-latency-ms MS]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="async-load-")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+
+import httpx  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from sqlalchemy.orm import Session, selectinload  # noqa: E402
+
+from server.main import app  # noqa: E402
+from server.apps.authentication.models import User  # noqa: E402
+from server.apps.planner.models import Goal, Task  # noqa: E402
+from server.apps.planner.schemas import GoalResponse  # noqa: E402
+from server.core.database import SessionLocal, create_db_and_tables, get_db  # noqa: E402
+from server.core.security import UserPrincipal, create_access_token, get_current_user  # noqa: E402
+
+
+def seed(goals: int, tasks_per_goal: int) -> str:
+    """Create one user with goals and tasks; return a bearer token for them."""
+    create_db_and_tables()
+    with SessionLocal() as db:
+        user = User(first_name="Load", last_name="Test", email="load@example.com",
+                    hashed_password="unused")
+        db.add(user)
+        db.flush()
+        for goal_index in range(goals):
+            goal = Goal(title=f"Goal {goal_index}", description="", user_id=user.id)
+            db.add(goal)
+            db.flush()
+            db.add_all(Task(title=f"Task {i}", goal_id=goal.id) for i in range(tasks_per_goal))
+        db.commit()
+    return create_access_token({"sub": "load@example.com"})
+
+
+def add_sync_baseline(io_latency: float):
+    """Mount a sync twin of /planner/goals that runs on the threadpool."""
+
+    @app.get("/bench/sync/goals")
+    def sync_goals(
+        db: Session = Depends(get_db),
+        current_user: UserPrincipal = Depends(get_current_user)
+    ):
+        time.sleep(io_latency)
+        goals = (
+            db.query(Goal)
+            .options(selectinload(Goal.tasks))
+            .filter(Goal.user_id == current_user.id)
+            .order_by(Goal.id)
+            .limit(50)
+            .all()
+        )
+        return [GoalResponse.from_goal(goal) for goal in goals]
+
+
+def add_async_latency(io_latency: float):
+    """Make the async endpoint wait the same simulated I/O time, without a thread."""
+
+    @app.middleware("http")
+    async def simulated_io(request, call_next):
+        if request.url.path == "/planner/goals":
+            await asyncio.sleep(io_latency)
+        return await call_next(request)
+
+
+async def drive(client: httpx.AsyncClient, path: str, token: str, concurrency: int, total: int):
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def run(args):
+    token = seed(args.goals, args.tasks)
+    add_sync_baseline(args.io_latency_ms / 1000)
+    add_async_latency(args.io_latency_ms / 1000)
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = {}
+            for name, path in (("sync", "/bench/sync/goals"), ("async", "/planner/goals")):
+                await drive(client, path, token, args.concurrency, args.concurrency)  # warm up
+                results[name] = await drive(client, path, token, args.concurrency, args.requests)
+
+    print(f"concurrency={args.concurrency} requests={args.requests} "
+          f"io_latency={args.io_latency_ms}ms goals={args.goals}x{args.tasks}")
+    print(f"{'path':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<8}{result['rps']:>10.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async vs sync goal listing load test.")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--goals", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=2)
+    parser.add_argument("--io-latency-ms", type=float, default=250.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Microbenchmark: cached vs uncached JWT verification.
+
+Compares a full jwt.decode (HMAC check and claims parsing) with
+server.core.security.verify_access_token, which serves repeat tokens from the
+verified-token cache.
+
+Usage:
+    python -m benchmarks.jwt_cache [--iterations N]
+"""
+
+import argparse
+import os
+import timeit
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from jose import jwt  # noqa: E402  (settings must see SECRET_KEY first)
+
+from server.core.security import (  # noqa: E402
+    ALGORITHM,
+    SECRET_KEY,
+    create_access_token,
+    token_cache,
+    verify_access_token,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "benchmark@example.com"})
+    token_cache.clear()
+    verify_access_token(token)  # warm the cache
+
+    uncached = timeit.timeit(
+        lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), number=args.iterations
+    )
+    cached = timeit.timeit(lambda: verify_access_token(token), number=args.iterations)
+
+    print(f"{'path':<10}{'total s':>10}{'us/op':>10}{'ops/s':>12}")
+    for name, seconds in (("uncached", uncached), ("cached", cached)):
+        print(
+            f"{name:<10}{seconds:>10.3f}{seconds / args.iterations * 1e6:>10.2f}"
+            f"{args.iterations / seconds:>12.0f}"
+        )
+    print(f"speedup: {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmark: lean list serialization vs the previous response_model path.
+
+Seeds a throwaway SQLite database with one user owning --goals goals of --tasks
+tasks each (1k x 20 by default), then reads every goal through two equivalent
+endpoints, page by page:
+
+- legacy: the previous /planner/goals implementation, mounted at
+  /bench/legacy/goals. It loads ORM objects with selectinload, builds
+  GoalResponse models that embed the Task table model, and lets FastAPI
+  validate and encode them against response_model.
+- lean: the current /planner/goals. It selects plain columns, builds dicts and
+  returns them pre-encoded with orjson (see server.core.responses).
+
+It also times the response-building and encoding step alone, on data already
+in memory, to separate it from query and ORM loading costs.
+
+Usage:
+    python -m benchmarks.serialization [--goals N] [--tasks N] [--rounds N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+_db_dir = tempfile.mkdtemp(prefix="serialization-")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+
+import httpx  # noqa: E402
+from fastapi import Depends, Query  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+from typing import List, Optional  # noqa: E402
+
+from server.main import app  # noqa: E402
+from server.apps.authentication.models import User  # noqa: E402
+from server.apps.planner.models import Goal, Task  # noqa: E402
+from server.apps.planner.schemas import GOAL_FIELDS, TASK_FIELDS, goal_dict, task_dict  # noqa: E402
+from server.core.database import SessionLocal, create_db_and_tables, get_async_db  # noqa: E402
+from server.core.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor  # noqa: E402
+from server.core.responses import dumps  # noqa: E402
+from server.core.security import UserPrincipal, create_access_token, get_current_user  # noqa: E402
+
+
+class LegacyGoalResponse(BaseModel):
+    """GoalResponse as it was before: tasks typed as the Task table model."""
+    id: uuid.UUID
+    title: str
+    description: str
+    completed: bool
+    user_id: uuid.UUID
+    total_tasks: int = 0
+    completed_tasks: int = 0
+    completion_percentage: float = 0
+    tasks: List[Task] = []
+
+
+class LegacyGoalPage(BaseModel):
+    items: List[LegacyGoalResponse]
+    next_cursor: Optional[str] = None
+
+
+def legacy_goal(goal: Goal) -> LegacyGoalResponse:
+    return LegacyGoalResponse(
+        id=goal.id, title=goal.title, description=goal.description, completed=goal.completed,
+        user_id=goal.user_id, total_tasks=goal.total_tasks, completed_tasks=goal.completed_tasks,
+        completion_percentage=goal.completion_percentage, tasks=goal.tasks
+    )
+
+
+@app.get("/bench/legacy/goals", response_model=LegacyGoalPage)
+async def legacy_goals(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    after_id = decode_cursor(cursor)
+    query = select(Goal).where(Goal.user_id == current_user.id)
+    if after_id is not None:
+        query = query.where(Goal.id > after_id)
+    result = await db.execute(
+        query.options(selectinload(Goal.tasks)).order_by(Goal.id).limit(limit + 1)
+    )
+    goals = result.scalars().all()
+    next_cursor = encode_cursor(goals[limit - 1].id) if len(goals) > limit else None
+    return LegacyGoalPage(items=[legacy_goal(goal) for goal in goals[:limit]], next_cursor=next_cursor)
+
+
+def seed(goals: int, tasks_per_goal: int) -> str:
+    """Create one user with goals and tasks in bulk; return a bearer token for them."""
+    create_db_and_tables()
+    with SessionLocal() as db:
+        user = User(first_name="Bench", last_name="Mark", email="bench@example.com",
+                    hashed_password="unused")
+        db.add(user)
+        db.flush()
+        goal_rows, task_rows = [], []
+        for goal_index in range(goals):
+            goal_id = uuid.uuid4()
+            goal_rows.append({"id": goal_id, "title": f"Goal {goal_index}", "description": "Benchmark goal",
+                              "completed": False, "user_id": user.id, "total_tasks": tasks_per_goal,
+                              "completed_tasks": tasks_per_goal // 2})
+            task_rows.extend({"id": uuid.uuid4(), "title": f"Task {i}", "completed": i % 2 == 0,
+                              "goal_id": goal_id} for i in range(tasks_per_goal))
+        db.execute(insert(Goal), goal_rows)
+        db.execute(insert(Task), task_rows)
+        db.commit()
+    return create_access_token({"sub": "bench@example.com"})
+
+
+async def walk(client: httpx.AsyncClient, path: str, token: str) -> tuple:
+    """Fetch every page of a goal listing; return (seconds, goals, bytes)."""
+    headers = {"Authorization": f"Bearer {token}"}
+    cursor, goals, size = None, 0, 0
+    start = time.perf_counter()
+    while True:
+        params = {"limit": MAX_PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(path, params=params, headers=headers)
+        response.raise_for_status()
+        size += len(response.content)
+        page = response.json()
+        goals += len(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return time.perf_counter() - start, goals, size
+
+
+async def encode_only(rounds: int) -> dict:
+    """Time just the response-building and encoding step on data already in memory."""
+    legacy_field = next(
+        route.response_field for route in app.routes if getattr(route, "path", "") == "/bench/legacy/goals"
+    )
+
+    with SessionLocal() as db:
+        goals = db.execute(select(Goal).options(selectinload(Goal.tasks)).limit(MAX_PAGE_SIZE)).scalars().all()
+        legacy_input = goals
+        # The lean path reads plain rows, not ORM objects
+        goal_rows = db.execute(select(*GOAL_FIELDS).where(Goal.id.in_([goal.id for goal in goals]))).all()
+        task_rows = db.execute(select(*TASK_FIELDS).where(Task.goal_id.in_([goal.id for goal in goals]))).all()
+        tasks_by_goal = {}
+        for row in task_rows:
+            tasks_by_goal.setdefault(row.goal_id, []).append(row)
+        lean_input = [(row, tasks_by_goal.get(row.id, [])) for row in goal_rows]
+
+        async def legacy():
+            page = LegacyGoalPage(items=[legacy_goal(goal) for goal in legacy_input])
+            # FastAPI's own response_model validation and encoding
+            return await serialize_response(field=legacy_field, response_content=page, dump_json=True)
+
+        async def lean():
+            return dumps({"items": [goal_dict(goal, [task_dict(task) for task in tasks])
+                                    for goal, tasks in lean_input], "next_cursor": None})
+
+        results = {}
+        for name, function in (("legacy", legacy), ("lean", lean)):
+            timings = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                await function()
+                timings.append(time.perf_counter() - start)
+            results[name] = statistics.median(timings)
+        return results
+
+
+async def run(args):
+    token = seed(args.goals, args.tasks)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, path in (("legacy", "/bench/legacy/goals"), ("lean", "/planner/goals")):
+                await walk(client, path, token)  # warm up
+                timings = []
+                for _ in range(args.rounds):
+                    seconds, goals, size = await walk(client, path, token)
+                    timings.append(seconds)
+                results[name] = (statistics.median(timings), goals, size)
+
+    print(f"goals={args.goals} tasks/goal={args.tasks} page={MAX_PAGE_SIZE} rounds={args.rounds}")
+    print(f"{'path':<8}{'walk ms':>10}{'goals':>8}{'KiB':>10}")
+    for name, (seconds, goals, size) in results.items():
+        print(f"{name:<8}{seconds * 1000:>10.1f}{goals:>8}{size / 1024:>10.0f}")
+    print(f"end-to-end speedup: {results['legacy'][0] / results['lean'][0]:.1f}x")
+
+    encode = await encode_only(args.rounds)
+    print(f"encode one page of {MAX_PAGE_SIZE} goals: legacy {encode['legacy'] * 1000:.1f} ms, "
+          f"lean {encode['lean'] * 1000:.1f} ms ({encode['legacy'] / encode['lean']:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lean vs legacy goal list serialization.")
+    parser.add_argument("--goals", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,6 @@ This module initializes the authentication app and sets up its routes.
 """
 
 from fastapi import APIRouter
-from . import routes  # Import moved to the top as per PEP 8 guidelines
 
 router = APIRouter()
 
@@ -1,45 +1,47 @@
 """Authentication routes module for handling user registration, login, and profile management."""
 
 # Standard library imports
+import logging
 import uuid
 from datetime import timedelta
-from pathlib import Path
 
 # Third-party imports
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Form
 from fastapi.responses import HTMLResponse
-from fastapi.security import OAuth2PasswordBearer
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select, update
 
 # Local application imports
-from server.core.database import get_db
+from server.core.database import AsyncSessionLocal, get_async_db
+from server.core.pages import page_cache
 from server.core.security import (
+    UserPrincipal,
     create_access_token,
     get_current_user,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    invalidate_user,
+    needs_rehash,
+    verify_password_async,
 )
 from server.apps.authentication.models import User
 from .schemas import UserCreate, UserLogin, UserResponse, UserUpdate
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 templates = Jinja2Templates(directory="src/pages")
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-
 
 @router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user with the provided information.
     
     Args:
         user: User creation data
-        db: Database session
+        db: Async database session
         
     Returns:
         Newly created user information
@@ -47,11 +49,11 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If email is already registered
     """
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    result = await db.execute(select(User).where(User.email == user.email))
+    if result.scalars().first():
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password_async(user.password)
     new_user = User(
         first_name=user.first_name,
         last_name=user.last_name,
@@ -59,8 +61,8 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     # Convert the UUID to a string in the response
     return UserResponse(
@@ -73,34 +75,66 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/register", response_class=HTMLResponse)
-def register_page():
+def register_page(request: Request):
     """
-    Serve the user registration page.
+    Serve the user registration page from the page cache.
     
+    Args:
+        request: Incoming request, for content negotiation and If-None-Match
+
     Returns:
         HTML response with registration form
     """
-    # Path to the registration HTML file
-    html_file_path = Path(__file__).parent.parent.parent.parent / "src/pages/registration-page.html"
+    response = page_cache.serve(request, "registration-page.html")
+    if response is not None:
+        return response
+    return HTMLResponse(content="<h1>Registration page not found</h1>", status_code=404)
+
+
+async def upgrade_password_hash(user_id: uuid.UUID, old_hash: str, password: str):
+    """
+    Rehash a password with the current cost factor and scheme.
+
+    Runs as a background task after a successful login. The row is only updated
+    if its hash is still the one that was verified, so a concurrent password
+    change is never overwritten.
 
-    # Read the HTML file content
-    if html_file_path.exists():
-        html_content = html_file_path.read_text(encoding="utf-8")
-        return HTMLResponse(content=html_content)
-    else:
-        return HTMLResponse(content="<h1>Registration page not found</h1>", status_code=404)
+    Args:
+        user_id: ID of the user whose hash is outdated
+        old_hash: Hash that was just verified
+        password: Plain text password from the login request
+    """
+    try:
+        new_hash = await hash_password_async(password)
+    except HTTPException:
+        return  # Hashing pool is saturated; retry on a later login
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+        await db.commit()
 
 
 @router.post("/login", response_model=dict)
-def login_user(
+async def login_user(
+    background_tasks: BackgroundTasks,
     username: str = Form(...),  # not 'email'
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_user = db.query(User).filter(User.email == username).first()
-    if not db_user or not verify_password(password, db_user.hashed_password):
+    result = await db.execute(select(User).where(User.email == username))
+    db_user = result.scalars().first()
+    if not db_user or not await verify_password_async(password, db_user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
+    if needs_rehash(db_user.hashed_password):
+        background_tasks.add_task(
+            upgrade_password_hash, db_user.id, db_user.hashed_password, password
+        )
+
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
         data={"sub": db_user.email}, expires_delta=access_token_expires
@@ -109,32 +143,29 @@ def login_user(
 
 
 @router.get("/login", response_class=HTMLResponse)
-def login_page():
+def login_page(request: Request):
     """
-    Serve the login page.
+    Serve the login page from the page cache.
     
+    Args:
+        request: Incoming request, for content negotiation and If-None-Match
+
     Returns:
         HTML response with login form
     """
-    # Path to the login HTML file
-    html_file_path = Path(__file__).parent.parent.parent.parent / "src/pages/login-page.html"
-
-    # Read the HTML file content
-    if html_file_path.exists():
-        html_content = html_file_path.read_text(encoding="utf-8")
-        return HTMLResponse(content=html_content)
-    else:
-        return HTMLResponse(content="<h1>Login page not found</h1>", status_code=404)
+    response = page_cache.serve(request, "login-page.html")
+    if response is not None:
+        return response
+    return HTMLResponse(content="<h1>Login page not found</h1>", status_code=404)
 
 
 @router.get("/get_user_id", response_model=dict)
-def get_user_id(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_user_id(user: UserPrincipal = Depends(get_current_user)):
     """
     Get the current user's ID from token.
     
     Args:
-        token: JWT access token
-        db: Database session
+        user: Authenticated user resolved from the JWT access token
         
     Returns:
         User ID as string
@@ -142,22 +173,16 @@ def get_user_id(token: str = Depends(oauth2_scheme), db: Session = Depends(get_d
     Raises:
         HTTPException: If token is invalid
     """
-    # Validate the token and get the current user
-    user = get_current_user(token, db)
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
     # Return the user's ID
     return {"user_id": str(user.id)}
 
 @router.get("/get_user_data", response_model=UserResponse)
-def get_user_data(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_user_data(user: UserPrincipal = Depends(get_current_user)):
     """
     Get current user's profile data.
     
     Args:
-        token: JWT access token
-        db: Database session
+        user: Authenticated user resolved from the JWT access token
         
     Returns:
         Current user's profile information
@@ -165,11 +190,6 @@ def get_user_data(token: str = Depends(oauth2_scheme), db: Session = Depends(get
     Raises:
         HTTPException: If token is invalid
     """
-    # Validate the token and get the current user
-    user = get_current_user(token, db)
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
     # Return the user's data as UserResponse
     return UserResponse(
         id=str(user.id),
@@ -179,13 +199,16 @@ def get_user_data(token: str = Depends(oauth2_scheme), db: Session = Depends(get
     )
 
 @router.delete("/delete_account", response_model=dict)
-def delete_account(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def delete_account(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Delete the current user's account.
     
     Args:
-        token: JWT access token
-        db: Database session
+        current_user: Authenticated user resolved from the JWT access token
+        db: Async database session
         
     Returns:
         Success message
@@ -193,22 +216,20 @@ def delete_account(token: str = Depends(oauth2_scheme), db: Session = Depends(ge
     Raises:
         HTTPException: If token is invalid or deletion fails
     """
-    # Validate the token and get the current user
-    current_user = get_current_user(token, db)
-    if not current_user:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
     try:
         # Delete the user
         user_id = current_user.id  # Save ID for logging
-        db.delete(current_user)
-        db.commit()
-        print(f"User account deleted: {user_id}")
+        db_user = await db.get(User, user_id)
+        if db_user is not None:
+            await db.delete(db_user)
+            await db.commit()
+        invalidate_user(current_user.email)
+        logger.info("User account deleted: %s", user_id)
 
         return {"message": "Account successfully deleted"}
     except Exception as e:
-        db.rollback()
-        print(f"Error deleting account: {e}")
+        await db.rollback()
+        logger.error("Error deleting account: %s", e)
         # Proper exception chaining using "from"
         raise HTTPException(
             status_code=500,
@@ -3,17 +3,38 @@ Models for the events application including Event, EventVote, EventRegistration,
 and EventComment entities, along with related enums and schemas.
 """
 
+import threading
+import time
+from datetime import datetime, timezone
 from enum import Enum
 from uuid import uuid4, UUID
 from typing import Optional, List
 from pydantic import BaseModel
+from sqlalchemy import BigInteger, Index
 from sqlmodel import SQLModel, Field, Column, DateTime, UniqueConstraint, Relationship
 
+_revision_lock = threading.Lock()
+_last_revision = 0
+
+def new_revision() -> int:
+    """
+    Return a goal revision stamp: nanoseconds since the epoch, strictly
+    increasing within the process, so the newest change always has the highest
+    stamp.
+    """
+    global _last_revision  # pylint: disable=global-statement
+    with _revision_lock:
+        _last_revision = max(time.time_ns(), _last_revision + 1)
+        return _last_revision
+
 class Task(SQLModel, table=True):
     """
     Model representing a task in the system.
     Contains details about the task, its status, and associated metadata.
     """
+    # Backs keyset pagination of a goal's tasks (WHERE goal_id = ? AND id > ? ORDER BY id)
+    __table_args__ = (Index("ix_task_goal_id_id", "goal_id", "id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     title: str = Field(max_length=150, index=True)
     completed: bool = Field(default=False, index=True)
@@ -29,20 +50,43 @@ class Goal(SQLModel, table=True):
     Model representing a goal in the system.
     Contains details about the goal, its status, and associated metadata.
     """
+    # Backs keyset pagination of a user's goals (WHERE user_id = ? AND id > ? ORDER BY id)
+    __table_args__ = (Index("ix_goal_user_id_id", "user_id", "id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     title: str = Field(max_length=150, index=True)
     description: str = Field(max_length=1000)
     completed: bool = Field(default=False, index=True)
     user_id: UUID = Field(foreign_key="user.id", nullable=False)
 
+    # Progress counters, kept in step with the tasks by every task mutation (see progress.py)
+    total_tasks: int = Field(default=0)
+    completed_tasks: int = Field(default=0)
+    # Bumped on any change to the goal or its tasks; the basis of the goal's ETags
+    revision: int = Field(default_factory=new_revision, sa_type=BigInteger)
+
     # Relationship to tasks
     tasks: List[Task] = Relationship(back_populates="goal")
 
-    # You might want to calculate completion status based on tasks
     @property
     def completion_percentage(self):
-        """Calculate the percentage of completed tasks."""
-        if not self.tasks:
+        """Calculate the percentage of completed tasks from the progress counters."""
+        if not self.total_tasks:
             return 0
-        completed_tasks = sum(1 for task in self.tasks if task.completed)
-        return (completed_tasks / len(self.tasks)) * 100
+        return (self.completed_tasks / self.total_tasks) * 100
+
+class PlanCacheEntry(SQLModel, table=True):
+    """
+    Model representing a cached AI-generated plan.
+    Keyed by the normalized goal title so identical requests share one plan.
+    """
+    __tablename__ = "plan_cache"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    normalized_title: str = Field(max_length=150, unique=True, index=True)
+    plan: str  # JSON document as returned by the model
+    # User the plan was generated for; only they are served it on a near match
+    user_id: Optional[UUID] = Field(default=None)
+    hits: int = Field(default=0)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    last_used_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
@@ -0,0 +1,290 @@
+"""
+Persistent cache of AI-generated plans.
+
+Many users ask for near-identical goals ("learn python", "Learn Python!"), and
+each request would otherwise pay a full model round trip. Plans are stored in
+the plan_cache table under a normalized title (lowercase, punctuation and extra
+whitespace removed), along with the user they were generated for. A lookup
+first tries that exact key, then the closest title the same user cached, by
+character-trigram similarity, if it reaches PLAN_CACHE_SIMILARITY.
+
+Only the description and tasks of a plan are cached; the title is always the
+requester's own. The model's text can quote the title it was given, so a plan
+reaches another user only when their normalized title is exactly the same:
+a cache hit never reveals what another user asked for.
+
+Entries expire PLAN_CACHE_TTL_SECONDS after they were generated, and beyond
+PLAN_CACHE_MAX_ENTRIES the least recently used ones are evicted. The trigram
+index of cached titles is kept in memory per process and loaded from the table
+on first use; a stale index can only cause a miss, since every near match is
+read back from the table.
+"""
+
+import json
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, FrozenSet, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from server.core.config import settings
+from server.core.database import AsyncSessionLocal, add_missing_columns
+from server.core.metrics import registry
+from .models import PlanCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_lookups = registry.counter(
+    "plan_cache_lookups_total", "AI plan cache lookups, by result (hit, near_hit, miss, bypass)"
+)
+_hit_ratio = registry.gauge(
+    "plan_cache_hit_ratio", "Share of AI plan cache lookups served from the cache"
+)
+_lookup_seconds = registry.histogram(
+    "plan_cache_lookup_seconds", "Time to look up a plan in the AI plan cache"
+)
+_evictions = registry.counter(
+    "plan_cache_evictions_total", "AI plan cache entries removed, by reason (expired, size)"
+)
+
+# Plan fields cached and served to users asking for the same goal
+SHARED_PLAN_FIELDS = ("description", "tasks_to_goal")
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_title(goal_title: str) -> str:
+    """
+    Reduce a goal title to its cache key.
+
+    Args:
+        goal_title: Title as typed by the user
+
+    Returns:
+        Lowercase title without punctuation and with single spaces
+    """
+    title = _NON_WORD.sub(" ", goal_title.lower())
+    return _SPACES.sub(" ", title).strip()
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Return the character trigrams of a normalized title, padded at word edges."""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    """Dice coefficient of two trigram sets: 1.0 for identical, 0.0 for disjoint."""
+    if not first or not second:
+        return 0.0
+    return 2 * len(first & second) / (len(first) + len(second))
+
+
+def ensure_plan_cache_columns(bind: Engine) -> None:
+    """Add the owner column to a plan_cache table created before it existed."""
+    owner = PlanCacheEntry.__table__.c.user_id
+    add_missing_columns(bind, "plan_cache", {"user_id": owner.type.compile(dialect=bind.dialect)})
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite hands datetimes back without tzinfo; they are stored in UTC
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+class PlanCache:
+    """
+    Table-backed plan cache with near-match lookup, TTL and LRU eviction.
+
+    Attributes:
+        ttl_seconds (int): Lifetime of an entry from when its plan was generated.
+        max_entries (int): Entries kept before the least recently used are evicted.
+        min_similarity (float): Trigram similarity required for a near match.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, min_similarity: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        # Normalized title -> (its trigrams, the user the plan was generated for)
+        self._index: Optional[Dict[str, Tuple[FrozenSet[str], Optional[UUID]]]] = None
+        self._hits = 0
+        self._lookups = 0
+
+    async def _load_index(self, db) -> Dict[str, Tuple[FrozenSet[str], Optional[UUID]]]:
+        if self._index is None:
+            rows = (await db.execute(
+                select(PlanCacheEntry.normalized_title, PlanCacheEntry.user_id)
+            )).all()
+            self._index = {title: (trigrams(title), user_id) for title, user_id in rows}
+        return self._index
+
+    def _nearest(
+        self, index: Dict[str, Tuple[FrozenSet[str], Optional[UUID]]], key: str, user_id: UUID
+    ) -> Optional[str]:
+        if self.min_similarity >= 1.0:
+            return None
+        wanted = trigrams(key)
+        best: Tuple[float, Optional[str]] = (0.0, None)
+        for title, (grams, owner_id) in index.items():
+            if owner_id != user_id:
+                continue
+            score = similarity(wanted, grams)
+            if score > best[0]:
+                best = (score, title)
+        return best[1] if best[0] >= self.min_similarity else None
+
+    def _record(self, result: str) -> None:
+        _lookups.inc(result=result)
+        if result == "bypass":
+            return
+        self._lookups += 1
+        if result in ("hit", "near_hit"):
+            self._hits += 1
+        _hit_ratio.set(self._hits / self._lookups)
+
+    def record_bypass(self) -> None:
+        """Count a request that skipped the cache on purpose."""
+        self._record("bypass")
+
+    async def lookup(self, goal_title: str, user_id: UUID) -> Optional[dict]:
+        """
+        Find a cached plan for a goal title: any user's under the exact key, or
+        the requester's own by near match.
+
+        A hit updates the entry's hit count and last-used time.
+
+        Args:
+            goal_title: Title as typed by the user
+            user_id: User asking for the plan
+
+        Returns:
+            The cached plan, without a title, or None on a miss
+        """
+        start = time.perf_counter()
+        key = normalize_title(goal_title)
+        async with AsyncSessionLocal() as db:
+            index = await self._load_index(db)
+            result, matched = "hit", key
+            if key not in index:
+                result, matched = "near_hit", self._nearest(index, key, user_id)
+
+            entry = None
+            if matched is not None:
+                entry = (await db.execute(
+                    select(PlanCacheEntry).where(PlanCacheEntry.normalized_title == matched)
+                )).scalars().first()
+                if entry is None:
+                    index.pop(matched, None)  # removed by another process
+                elif result == "near_hit" and entry.user_id != user_id:
+                    # Regenerated for another user since the index was loaded
+                    index[matched] = (index[matched][0], entry.user_id)
+                    entry = None
+
+            now = datetime.now(timezone.utc)
+            if entry is not None and _as_utc(entry.created_at) + timedelta(seconds=self.ttl_seconds) <= now:
+                await db.delete(entry)
+                await db.commit()
+                index.pop(matched, None)
+                _evictions.inc(reason="expired")
+                entry = None
+
+            if entry is None:
+                self._record("miss")
+                _lookup_seconds.observe(time.perf_counter() - start)
+                return None
+
+            await db.execute(
+                update(PlanCacheEntry)
+                .where(PlanCacheEntry.id == entry.id)
+                .values(hits=PlanCacheEntry.hits + 1, last_used_at=now)
+            )
+            await db.commit()
+
+        self._record(result)
+        _lookup_seconds.observe(time.perf_counter() - start)
+        cached = json.loads(entry.plan)
+        if result == "near_hit":
+            logger.info("Plan cache near hit: '%s' served from '%s'", key, matched)
+        return {field: cached[field] for field in SHARED_PLAN_FIELDS if field in cached}
+
+    async def store(self, goal_title: str, plan: dict, user_id: UUID) -> None:
+        """
+        Save the shareable fields of a freshly generated plan, replacing any
+        entry under the same key, then evict expired and least recently used
+        entries.
+
+        Args:
+            goal_title: Title as typed by the user
+            plan: Parsed plan as returned by the model
+            user_id: User the plan was generated for
+        """
+        key = normalize_title(goal_title)
+        if not key:
+            return
+        now = datetime.now(timezone.utc)
+        plan = {field: plan[field] for field in SHARED_PLAN_FIELDS if field in plan}
+        async with AsyncSessionLocal() as db:
+            index = await self._load_index(db)
+            entry = (await db.execute(
+                select(PlanCacheEntry).where(PlanCacheEntry.normalized_title == key)
+            )).scalars().first()
+            if entry is None:
+                db.add(PlanCacheEntry(normalized_title=key, plan=json.dumps(plan), user_id=user_id,
+                                      created_at=now, last_used_at=now))
+            else:
+                entry.plan = json.dumps(plan)
+                entry.user_id = user_id
+                entry.created_at = now
+                entry.last_used_at = now
+            try:
+                await db.commit()
+                index[key] = (trigrams(key), user_id)
+            except IntegrityError:
+                # Another request cached the same title first; keep theirs, whoever it was for
+                await db.rollback()
+                index[key] = (trigrams(key), None)
+            await self._evict(db, index, now)
+
+    async def _evict(
+        self, db, index: Dict[str, Tuple[FrozenSet[str], Optional[UUID]]], now: datetime
+    ) -> None:
+        expired = (await db.execute(
+            delete(PlanCacheEntry)
+            .where(PlanCacheEntry.created_at <= now - timedelta(seconds=self.ttl_seconds))
+            .returning(PlanCacheEntry.normalized_title)
+        )).scalars().all()
+
+        overflow = []
+        count = (await db.execute(select(func.count()).select_from(PlanCacheEntry))).scalar_one()
+        if count > self.max_entries:
+            oldest = (
+                select(PlanCacheEntry.id)
+                .order_by(PlanCacheEntry.last_used_at)
+                .limit(count - self.max_entries)
+            )
+            overflow = (await db.execute(
+                delete(PlanCacheEntry)
+                .where(PlanCacheEntry.id.in_(oldest))
+                .returning(PlanCacheEntry.normalized_title)
+            )).scalars().all()
+        await db.commit()
+
+        for title in (*expired, *overflow):
+            index.pop(title, None)
+        if expired:
+            _evictions.inc(len(expired), reason="expired")
+        if overflow:
+            _evictions.inc(len(overflow), reason="size")
+
+
+plan_cache = PlanCache(
+    ttl_seconds=settings.PLAN_CACHE_TTL_SECONDS,
+    max_entries=settings.PLAN_CACHE_MAX_ENTRIES,
+    min_similarity=settings.PLAN_CACHE_SIMILARITY
+)
@@ -0,0 +1,164 @@
+"""
+Denormalized goal progress counters.
+
+Goal.total_tasks and Goal.completed_tasks are kept in step with the goal's tasks
+by every code path that creates, toggles or deletes tasks, inside the same
+transaction, so progress can be read without loading the tasks. Goal.completed
+follows from the counters: a goal is complete when it has tasks and all are done.
+
+This module builds the counter updates and can check and repair counters in
+bulk against the task table:
+
+    python -m server.apps.planner.progress           # report goals whose counters drifted
+    python -m server.apps.planner.progress --repair  # recompute them
+"""
+
+import argparse
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import Integer, and_, func, inspect, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from server.core.database import SessionLocal, add_missing_columns, engine
+from .models import Goal, Task, new_revision
+
+
+def adjust_goal_counters(goal_id: UUID, total_delta: int = 0, completed_delta: int = 0):
+    """
+    Build the UPDATE that shifts a goal's task counters, recomputes Goal.completed
+    and bumps the goal's revision.
+
+    The deltas are applied in SQL, so concurrent transactions cannot overwrite
+    each other's changes.
+
+    Args:
+        goal_id: Goal whose tasks changed
+        total_delta: Tasks added (positive) or removed (negative)
+        completed_delta: Completed tasks added or removed
+
+    Returns:
+        The UPDATE statement, ready to execute
+    """
+    total = Goal.total_tasks + total_delta
+    completed = Goal.completed_tasks + completed_delta
+    return (
+        update(Goal)
+        .where(Goal.id == goal_id)
+        .values(total_tasks=total, completed_tasks=completed, completed=and_(total > 0, completed == total),
+                revision=new_revision())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _actual_counts():
+    total = (
+        select(func.count(Task.id)).where(Task.goal_id == Goal.id).scalar_subquery()
+    )
+    completed = (
+        select(func.coalesce(func.sum(Task.completed.cast(Integer)), 0))
+        .where(Task.goal_id == Goal.id)
+        .scalar_subquery()
+    )
+    return total, completed
+
+
+def find_drifted_goals(db: Session) -> List[UUID]:
+    """
+    Find goals whose stored counters disagree with their tasks.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Ids of the goals that need repair
+    """
+    total, completed = _actual_counts()
+    query = select(Goal.id).where(or_(
+        Goal.total_tasks != total,
+        Goal.completed_tasks != completed,
+        Goal.completed != and_(total > 0, completed == total)
+    ))
+    return list(db.execute(query).scalars().all())
+
+
+def repair_goal_counters(db: Session) -> int:
+    """
+    Recompute the counters of every goal that drifted, in one UPDATE.
+
+    Args:
+        db: Database session; the caller commits
+
+    Returns:
+        Number of goals repaired
+    """
+    drifted = find_drifted_goals(db)
+    if drifted:
+        total, completed = _actual_counts()
+        db.execute(
+            update(Goal)
+            .where(Goal.id.in_(drifted))
+            .values(total_tasks=total, completed_tasks=completed,
+                    completed=and_(total > 0, completed == total), revision=new_revision())
+            .execution_options(synchronize_session=False)
+        )
+    return len(drifted)
+
+
+def ensure_counter_columns(engine: Engine) -> int:
+    """
+    Add the counter and revision columns to a goal table created before they
+    existed, and backfill the counters of every goal.
+
+    The columns are added and backfilled in one transaction, so an interrupted
+    upgrade leaves the table as it was and is redone on the next start. Once
+    the columns exist this only inspects the table; counters that drift later
+    are repaired with the --repair command.
+
+    Args:
+        engine: Sync engine of the application database
+
+    Returns:
+        Number of goals backfilled
+    """
+    if not inspect(engine).has_table("goal"):
+        return 0
+    with engine.begin() as connection:
+        added = add_missing_columns(connection, "goal", {
+            "total_tasks": "INTEGER NOT NULL DEFAULT 0",
+            "completed_tasks": "INTEGER NOT NULL DEFAULT 0",
+            "revision": "BIGINT NOT NULL DEFAULT 0",
+        })
+        if not added:
+            return 0
+        with Session(bind=connection) as db:
+            return repair_goal_counters(db)
+
+
+def main():
+    """Report goals whose progress counters drifted, and repair them with --repair."""
+    parser = argparse.ArgumentParser(description="Check or repair goal progress counters.")
+    parser.add_argument("--repair", action="store_true", help="recompute counters that drifted")
+    args = parser.parse_args()
+
+    if not inspect(engine).has_table("goal"):
+        print("The database has no goal table yet")
+        return
+    ensure_counter_columns(engine)
+    with SessionLocal() as db:
+        if args.repair:
+            repaired = repair_goal_counters(db)
+            db.commit()
+            print(f"Repaired counters of {repaired} goals")
+            return
+        drifted = find_drifted_goals(db)
+    print(f"{len(drifted)} goals have drifted counters")
+    for goal_id in drifted[:20]:
+        print(f"  {goal_id}")
+    if drifted:
+        print("Run with --repair to fix them")
+
+
+if __name__ == "__main__":
+    main()
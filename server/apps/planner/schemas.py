@@ -4,7 +4,7 @@ This module provides schemas for data validation and serialization for the Event
 """
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, validator
@@ -51,13 +51,22 @@ class GoalResponse(BaseModel):
     description: str
     completed: bool
     user_id: UUID
-    tasks: List[Task] = []
+    total_tasks: int = 0
+    completed_tasks: int = 0
+    completion_percentage: float = 0
+    tasks: List["TaskResponse"] = []
 
     model_config = {"from_attributes": True}
 
     @classmethod
-    def from_goal(cls, goal: Goal):
-        """Convert a Goal model to a GoalResponse schema."""
+    def from_goal(cls, goal: Goal, tasks: Optional[List[Task]] = None):
+        """
+        Convert a Goal model to a GoalResponse schema.
+
+        Pass tasks when they are already at hand (e.g. a goal created in this
+        request); otherwise goal.tasks must have been eager-loaded, since async
+        sessions cannot lazy-load relationships.
+        """
         # Create instance with all required fields at once
         return cls(
             id=goal.id,
@@ -65,7 +74,10 @@ class GoalResponse(BaseModel):
             description=goal.description,
             completed=goal.completed,
             user_id=goal.user_id,
-            tasks=goal.tasks
+            total_tasks=goal.total_tasks,
+            completed_tasks=goal.completed_tasks,
+            completion_percentage=goal.completion_percentage,
+            tasks=[TaskResponse.from_task(task) for task in (goal.tasks if tasks is None else tasks)]
         )
 
 class TaskResponse(BaseModel):
@@ -86,3 +98,97 @@ class TaskResponse(BaseModel):
             completed=task.completed,
             goal_id=task.goal_id
         )
+
+GoalResponse.model_rebuild()
+
+# Columns read by the list endpoints, which build plain dicts from rows instead
+# of loading ORM objects and validating response models
+TASK_FIELDS = (Task.id, Task.title, Task.completed, Task.goal_id)
+GOAL_FIELDS = (Goal.id, Goal.title, Goal.description, Goal.completed, Goal.user_id,
+               Goal.total_tasks, Goal.completed_tasks)
+
+def task_dict(row) -> dict:
+    """Build the TaskResponse shape from a row of TASK_FIELDS."""
+    # Unpacking by position is much cheaper than attribute access on Row objects
+    task_id, title, completed, goal_id = row
+    return {"id": task_id, "title": title, "completed": completed, "goal_id": goal_id}
+
+def goal_dict(row, tasks: List[dict]) -> dict:
+    """Build the GoalResponse shape from a row of GOAL_FIELDS and its task dicts."""
+    goal_id, title, description, completed, user_id, total_tasks, completed_tasks = row
+    return {
+        "id": goal_id,
+        "title": title,
+        "description": description,
+        "completed": completed,
+        "user_id": user_id,
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_tasks,
+        "completion_percentage": completed_tasks / total_tasks * 100 if total_tasks else 0,
+        "tasks": tasks,
+    }
+
+class GoalPage(BaseModel):
+    """Schema for one page of goals; pass next_cursor back to fetch the following page."""
+    items: List[GoalResponse]
+    next_cursor: Optional[str] = None
+
+class TaskPage(BaseModel):
+    """Schema for one page of tasks; pass next_cursor back to fetch the following page."""
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None
+
+class PlanJobResponse(BaseModel):
+    """Schema for the state of a background AI plan job; goal is set once it has succeeded."""
+    id: str
+    status: str
+    goal: Optional[GoalResponse] = None
+    error: Optional[dict] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @classmethod
+    def from_job(cls, job):
+        """Convert a background Job to a PlanJobResponse schema."""
+        return cls(
+            id=job.id,
+            status=job.status,
+            goal=job.result,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at
+        )
+
+# Largest number of operations accepted in one task batch request
+MAX_BATCH_OPERATIONS = 200
+
+class TaskOperation(BaseModel):
+    """
+    Schema for one operation in a task batch: "create" needs title, "toggle"
+    needs id and completed, "delete" needs id.
+    """
+    op: Literal["create", "toggle", "delete"]
+    id: Optional[UUID] = None
+    title: Optional[str] = Field(default=None, max_length=150)
+    completed: Optional[bool] = None
+
+class TaskBatchRequest(BaseModel):
+    """Schema for a batch of task operations applied to one goal."""
+    operations: List[TaskOperation]
+
+class TaskOperationResult(BaseModel):
+    """
+    Schema for the outcome of one batch operation, in request order. status
+    uses HTTP codes: 201 created, 200 toggled, 204 deleted, 400 or 404 skipped.
+    """
+    index: int
+    op: str
+    status: int
+    task: Optional[TaskResponse] = None
+    detail: Optional[str] = None
+
+class TaskBatchResponse(BaseModel):
+    """Schema for the results of a task batch."""
+    results: List[TaskOperationResult]
@@ -0,0 +1,187 @@
+"""
+Incremental parsing and persistence of AI plans streamed from the model.
+
+The model streams its JSON plan in arbitrary text chunks. PlanStreamParser picks
+out the title, the description and each entry of "tasks_to_goal" as soon as the
+chunk completing it arrives, without waiting for the whole document.
+stream_ai_plan turns those into NDJSON events for the client, creating the goal
+once the task list starts and committing every task as it is parsed.
+"""
+
+import json
+import logging
+import re
+from typing import AsyncIterable, AsyncIterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Goal, Task
+from .progress import adjust_goal_counters
+from .schemas import GoalResponse, TaskResponse
+
+logger = logging.getLogger(__name__)
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class PlanStreamParser:
+    """
+    Pulls plan fields out of a partially received JSON document.
+
+    Feed it chunks in order; each call returns the fields completed by that
+    chunk as (kind, value) pairs, where kind is "title", "description" or "task".
+    """
+
+    _KEYS = {
+        "title": re.compile(r'"title"\s*:\s*"'),
+        "description": re.compile(r'"description"\s*:\s*"'),
+    }
+    _TASKS_KEY = re.compile(r'"tasks_to_goal"\s*:\s*\[')
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self.tasks: List[str] = []
+        self.tasks_started = False
+        self.tasks_done = False
+        self._task_pos: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """
+        Add a chunk of model output.
+
+        Args:
+            chunk: Next piece of the streamed response text
+
+        Returns:
+            Fields completed by this chunk, in document order
+        """
+        self.buffer += chunk
+        events = []
+
+        for kind, pattern in self._KEYS.items():
+            if kind in self.fields:
+                continue
+            match = pattern.search(self.buffer)
+            value = self._read_string(match.end() - 1) if match else None
+            if value is not None:
+                self.fields[kind] = value[0]
+                events.append((kind, value[0]))
+
+        if self._task_pos is None:
+            match = self._TASKS_KEY.search(self.buffer)
+            if match:
+                self._task_pos = match.end()
+                self.tasks_started = True
+
+        while self._task_pos is not None and not self.tasks_done:
+            pos = self._task_pos
+            while pos < len(self.buffer) and self.buffer[pos] in _WHITESPACE + ",":
+                pos += 1
+            if pos >= len(self.buffer):
+                break
+            if self.buffer[pos] == "]":
+                self.tasks_done = True
+                break
+            value = self._read_string(pos)
+            if value is None:
+                break
+            self._task_pos = value[1]
+            if value[0].strip():
+                self.tasks.append(value[0].strip())
+                events.append(("task", value[0].strip()))
+
+        return events
+
+    def _read_string(self, pos: int) -> Optional[Tuple[str, int]]:
+        """Decode a complete JSON string starting at pos, or None if it has not fully arrived."""
+        if pos >= len(self.buffer) or self.buffer[pos] != '"':
+            return None
+        try:
+            return _decoder.raw_decode(self.buffer, pos)
+        except json.JSONDecodeError:
+            return None
+
+    @property
+    def rejected(self) -> bool:
+        """True if the model declined the goal (it answers a bare 404)."""
+        return self.buffer.strip().strip("`").strip() == "404"
+
+
+def _event(kind: str, **payload) -> str:
+    return json.dumps({"event": kind, **payload}, default=str) + "\n"
+
+
+async def stream_ai_plan(
+    db: AsyncSession,
+    user_id: UUID,
+    goal_title: str,
+    chunks: AsyncIterable[str]
+) -> AsyncIterator[str]:
+    """
+    Turn streamed model output into persisted goal/task rows and NDJSON events.
+
+    Emits one "goal" event when the goal row is created, one "task" event per
+    committed task, then "done" (or "error" if the model declined or failed).
+
+    Args:
+        db: Async database session owned by the stream
+        user_id: Owner of the new goal
+        goal_title: Title the user asked for, used as the goal's title as in
+            persist_ai_plan; the model's own title is not stored
+        chunks: Model output text chunks, in order
+
+    Yields:
+        NDJSON lines
+    """
+    parser = PlanStreamParser()
+    goal: Optional[Goal] = None
+    task_count = 0
+
+    async def ensure_goal():
+        nonlocal goal
+        if goal is None:
+            goal = Goal(
+                title=goal_title,
+                description=parser.fields.get("description", ""),
+                user_id=user_id
+            )
+            db.add(goal)
+            await db.commit()
+            return _event("goal", goal=GoalResponse.from_goal(goal, tasks=[]).model_dump(mode="json"))
+        return None
+
+    try:
+        async for chunk in chunks:
+            for kind, value in parser.feed(chunk):
+                if kind != "task":
+                    continue
+                goal_line = await ensure_goal()
+                if goal_line:
+                    yield goal_line
+                task = Task(title=value, completed=False, goal_id=goal.id)
+                db.add(task)
+                await db.flush()
+                await db.execute(adjust_goal_counters(goal.id, 1, 0))
+                await db.commit()
+                task_count += 1
+                yield _event("task", task=TaskResponse.from_task(task).model_dump(mode="json"))
+    except Exception as e:  # pylint: disable=broad-except
+        await db.rollback()
+        logger.error("AI stream failed for goal '%s': %s", goal_title, e)
+        yield _event("error", detail="AI service encountered an error.",
+                     goal_id=goal.id if goal else None)
+        return
+
+    if goal is None:
+        if parser.rejected or "title" not in parser.fields:
+            yield _event("error", detail="AI could not generate a valid plan for this goal.")
+            return
+        goal_line = await ensure_goal()
+        if goal_line:
+            yield goal_line
+
+    logger.info("Streamed AI-generated goal '%s' with %d tasks", goal.title, task_count)
+    yield _event("done", goal_id=goal.id, task_count=task_count)
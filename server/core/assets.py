@@ -0,0 +1,244 @@
+"""
+Fingerprinted, precompressed static assets.
+
+At startup (or ahead of time with ``python -m server.core.assets``) every CSS
+and JS file under src/ is copied into ASSETS_BUILD_DIR under a name carrying a
+hash of its content, e.g. css/main-style.3f2a1b9c04de.css, next to .gz and .br
+siblings. Imports between JS modules are rewritten to the fingerprinted URLs
+first, so a module's hash also covers everything it imports. The HTML pages
+are rewritten the same way when the page cache loads them.
+
+Fingerprinted URLs are served under /assets with
+"Cache-Control: public, max-age=31536000, immutable": a file at a given URL
+never changes, so browsers reuse it without asking until the page points
+somewhere else. The un-fingerprinted /src mount stays available.
+"""
+
+import argparse
+import gzip
+import hashlib
+import logging
+import mimetypes
+import re
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse
+
+from .config import settings
+from .pages import accepted_encodings, page_cache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SOURCE_DIR = PROJECT_ROOT / "src"
+SOURCE_URL = "/src"
+ASSETS_URL = "/assets"
+ASSET_SUFFIXES = (".css", ".js")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# import ... from "x", export ... from "x", import "x" and import("x")
+_JS_IMPORT = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*)(["'])([^"'\n]+)\2""")
+# src="/src/..." and href="/src/..." in HTML pages
+_HTML_REFERENCE = re.compile(rb"""(\b(?:src|href)\s*=\s*)(["'])(/src/[^"'\s]+)\2""")
+
+
+class AssetManifest:
+    """
+    Mapping from source asset URLs to their fingerprinted URLs.
+
+    Attributes:
+        build_dir (Path): Directory holding the fingerprinted files.
+        urls (dict): Fingerprinted URL by source URL, e.g. "/src/js/home-code.js".
+        files (set): Fingerprinted paths relative to build_dir, the only ones served.
+    """
+
+    def __init__(self, build_dir: Path):
+        self.build_dir = build_dir
+        self.urls: Dict[str, str] = {}
+        self.files: Set[str] = set()
+
+    def rewrite_html(self, content: bytes) -> bytes:
+        """
+        Point src and href attributes that name a source asset at its fingerprinted URL.
+
+        Args:
+            content: HTML page
+
+        Returns:
+            The rewritten page
+        """
+        def replace(match):
+            url = self.urls.get(match.group(3).decode("utf-8"))
+            if url is None:
+                return match.group(0)
+            return match.group(1) + match.group(2) + url.encode("utf-8") + match.group(2)
+
+        return _HTML_REFERENCE.sub(replace, content)
+
+
+def _source_url(path: Path, source_dir: Path) -> str:
+    return f"{SOURCE_URL}/{path.relative_to(source_dir).as_posix()}"
+
+
+def _resolve_import(specifier: str, importer_url: str) -> Optional[str]:
+    """Turn a JS import specifier into an absolute /src URL, or None for anything else."""
+    specifier = specifier.strip()
+    if specifier.startswith("/"):
+        return specifier
+    if specifier.startswith(("./", "../")):
+        parts = importer_url.split("/")[:-1]
+        for part in specifier.split("/"):
+            if part == "..":
+                parts.pop()
+            elif part not in (".", ""):
+                parts.append(part)
+        return "/".join(parts)
+    return None
+
+
+def _write(path: Path, content: bytes) -> None:
+    """Write a file unless it already holds exactly this content (the name is a content hash)."""
+    if path.exists() and path.stat().st_size == len(content):
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def build_assets(source_dir: Path = SOURCE_DIR, build_dir: Optional[Path] = None) -> AssetManifest:
+    """
+    Fingerprint and precompress the CSS and JS under source_dir.
+
+    Args:
+        source_dir: Directory served at /src
+        build_dir: Output directory; defaults to ASSETS_BUILD_DIR
+
+    Returns:
+        The manifest of fingerprinted URLs
+
+    Raises:
+        ValueError: If JS modules import each other in a cycle
+    """
+    build_dir = build_dir or PROJECT_ROOT / settings.ASSETS_BUILD_DIR
+    manifest = AssetManifest(build_dir)
+    sources = {
+        _source_url(path, source_dir): path
+        for path in sorted(source_dir.rglob("*"))
+        if path.suffix in ASSET_SUFFIXES and path.is_file()
+    }
+    in_progress: Set[str] = set()
+
+    def fingerprint(url: str) -> str:
+        if url in manifest.urls:
+            return manifest.urls[url]
+        if url in in_progress:
+            raise ValueError(f"Import cycle through {url}")
+        in_progress.add(url)
+        content = sources[url].read_bytes()
+
+        if url.endswith(".js"):
+            def replace(match):
+                target = _resolve_import(match.group(3), url)
+                if target not in sources:
+                    return match.group(0)
+                return match.group(1) + match.group(2) + fingerprint(target) + match.group(2)
+
+            content = _JS_IMPORT.sub(replace, content.decode("utf-8")).encode("utf-8")
+
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        relative = Path(url[len(SOURCE_URL) + 1:])
+        name = (relative.parent / f"{relative.stem}.{digest}{relative.suffix}").as_posix()
+        _write(build_dir / name, content)
+        compressed = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed[".br"] = brotli.compress(content, mode=brotli.MODE_TEXT)
+        for suffix, data in compressed.items():
+            if len(data) < len(content):
+                _write(build_dir / (name + suffix), data)
+
+        in_progress.discard(url)
+        manifest.files.add(name)
+        manifest.urls[url] = f"{ASSETS_URL}/{name}"
+        return manifest.urls[url]
+
+    for url in sources:
+        fingerprint(url)
+    logger.info("Fingerprinted %d assets into %s", len(manifest.urls), build_dir)
+    return manifest
+
+
+asset_manifest: Optional[AssetManifest] = None
+
+router = APIRouter()
+
+
+@router.get("/{name:path}", include_in_schema=False)
+def serve_asset(name: str, request: Request):
+    """
+    Serve a fingerprinted asset, precompressed when the client accepts it.
+
+    Args:
+        name: Fingerprinted path relative to the build directory
+        request: Incoming request, for Accept-Encoding
+
+    Returns:
+        The file, with immutable caching headers
+
+    Raises:
+        HTTPException: 404 if the name is not a fingerprinted asset
+    """
+    if asset_manifest is None or name not in asset_manifest.files:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Asset not found")
+
+    path = asset_manifest.build_dir / name
+    headers = {"Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    accepted = accepted_encodings(request.headers.get("accept-encoding"))
+    for coding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        compressed = path.with_name(path.name + suffix)
+        if coding in accepted and compressed.exists():
+            headers["Content-Encoding"] = coding
+            return FileResponse(compressed, media_type=media_type, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def enable_fingerprinting() -> Optional[AssetManifest]:
+    """
+    Build the assets and make the page cache link to them; called at startup.
+
+    Returns:
+        The manifest, or None if ASSETS_FINGERPRINT is off or the build failed
+            (pages then keep linking to /src)
+    """
+    global asset_manifest
+
+    if not settings.ASSETS_FINGERPRINT:
+        return None
+    try:
+        asset_manifest = build_assets()
+    except (OSError, ValueError) as e:
+        logger.error("Asset fingerprinting failed, serving assets from %s: %s", SOURCE_URL, e)
+        return None
+    page_cache.set_transform(asset_manifest.rewrite_html)
+    return asset_manifest
+
+
+def main():
+    """Build the fingerprinted assets ahead of time and print the manifest."""
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress the assets under src/.")
+    parser.add_argument("--out", type=Path, help="output directory (default: ASSETS_BUILD_DIR)")
+    args = parser.parse_args()
+
+    manifest = build_assets(build_dir=args.out)
+    for source, url in sorted(manifest.urls.items()):
+        print(f"{source} -> {url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Bounded in-process caches with least-recently-used eviction and per-entry expiry.
+
+Each cache reports its hits, misses, evictions and size to the shared metrics
+registry under its own name, so it can be sized from real traffic.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from .metrics import registry
+
+
+_hits = registry.counter("cache_hits_total", "Lookups answered from an in-process cache")
+_misses = registry.counter("cache_misses_total", "Lookups that missed an in-process cache")
+_evictions = registry.counter(
+    "cache_evictions_total",
+    "Entries dropped from an in-process cache, by reason (size, expired, invalidated)"
+)
+_entries = registry.gauge("cache_entries", "Entries currently held by an in-process cache")
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a time-to-live.
+
+    Attributes:
+        name (str): Name used as the "cache" label on the cache metrics.
+        max_size (int): Maximum number of entries before the least recently used is evicted.
+        ttl_seconds (float): Default lifetime of an entry.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a live entry and mark it as recently used.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            The cached value, or default if absent or expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    _hits.inc(cache=self.name)
+                    return value
+                del self._entries[key]
+                _evictions.inc(cache=self.name, reason="expired")
+                _entries.set(len(self._entries), cache=self.name)
+            _misses.inc(cache=self.name)
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl_seconds: Lifetime of this entry; defaults to the cache's ttl_seconds
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                _evictions.inc(cache=self.name, reason="size")
+            _entries.set(len(self._entries), cache=self.name)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop an entry, if present."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                _evictions.inc(cache=self.name, reason="invalidated")
+                _entries.set(len(self._entries), cache=self.name)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            _entries.set(0, cache=self.name)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -2,6 +2,8 @@
 This module defines the application settings and configuration using Pydantic's BaseSettings.
 """
 
+from typing import Dict, Optional
+
 from pydantic.v1 import BaseSettings
 
 
@@ -11,14 +13,166 @@ class Settings(BaseSettings):
 
     Attributes:
         DATABASE_URL (str): The database connection URL.
+        ASYNC_DATABASE_URL (Optional[str]): Connection URL for the async engine; derived from
+            DATABASE_URL (aiosqlite for SQLite, asyncpg for PostgreSQL) when unset.
+        DB_POOL_SIZE (int): Connections kept open in each engine's pool.
+        DB_MAX_OVERFLOW (int): Extra connections a pool may open under load.
+        DB_POOL_TIMEOUT (float): Seconds to wait for a free connection before failing.
+        DB_POOL_RECYCLE (int): Seconds after which a pooled connection is replaced.
+        DB_POOL_PRE_PING (bool): Test connections on checkout and replace dead ones.
+        SQLITE_JOURNAL_MODE (str): SQLite journal mode; WAL lets readers run alongside a writer.
+        SQLITE_SYNCHRONOUS (str): SQLite fsync level; NORMAL is safe with WAL.
+        SQLITE_BUSY_TIMEOUT_MS (int): How long SQLite waits on a lock before "database is locked".
+        SQLITE_MMAP_SIZE (int): Bytes of the database file SQLite may memory-map.
+        SQLITE_CACHE_SIZE_KB (int): SQLite page cache size per connection, in KiB.
         SECRET_KEY (str): The secret key for cryptographic operations.
         ALGORITHM (str): The algorithm used for token encoding.
         ACCESS_TOKEN_EXPIRE_MINUTES (int): The token expiration time in minutes.
+        USER_CACHE_MAX_SIZE (int): Maximum number of authenticated users cached in memory.
+        USER_CACHE_TTL_SECONDS (int): How long a cached user is trusted before it is reloaded.
+        TOKEN_CACHE_MAX_SIZE (int): Maximum number of verified token payloads cached in memory.
+        TOKEN_CACHE_TTL_SECONDS (int): Upper bound on how long a verified token stays cached;
+            entries never outlive the token's own exp claim.
+        BCRYPT_WORKERS (Optional[int]): Password hashing worker processes; defaults to the CPU count.
+        BCRYPT_MAX_PENDING (int): Hashing jobs allowed to queue for a worker before requests
+            are refused with 503.
+        BCRYPT_TARGET_MS (int): Target time for one bcrypt hash; the cost factor is calibrated
+            against it at startup.
+        BCRYPT_MIN_ROUNDS (int): Lowest bcrypt cost factor calibration may choose.
+        BCRYPT_MAX_ROUNDS (int): Highest bcrypt cost factor calibration may choose.
+        BCRYPT_ROUNDS (Optional[int]): Fixed bcrypt cost factor; skips calibration when set.
+        AI_BACKEND (str): Plan generation backend: "gemini", or "stub" for local canned plans.
+        GEMINI_API_KEY (Optional[str]): API key for the Gemini backend.
+        GEMINI_MODEL (str): Gemini model used for plan generation.
+        AI_MAX_CONCURRENCY (int): Upstream AI calls allowed in flight at once.
+        AI_TIMEOUT_SECONDS (float): Deadline for one AI call attempt (for streams, between chunks).
+        AI_DEADLINE_SECONDS (float): Deadline for a whole AI call: the wait for a concurrency slot,
+            every attempt and the backoff between them.
+        AI_MAX_RETRIES (int): Retries after a transient AI failure before giving up.
+        AI_RETRY_BASE_SECONDS (float): First retry backoff; doubles per attempt, with full jitter.
+        AI_RETRY_MAX_SECONDS (float): Upper bound on a single retry backoff.
+        AI_CIRCUIT_FAILURE_THRESHOLD (int): Consecutive failed calls that open the circuit breaker.
+        AI_CIRCUIT_RESET_SECONDS (float): How long the circuit stays open before a trial call.
+        AI_STUB_LATENCY_MS (float): Simulated response time of the stub backend.
+        AI_STUB_FAILURE_RATE (float): Fraction of stub calls that fail with a transient error.
+        PLAN_CACHE_ENABLED (bool): Serve repeated AI plan requests from the plan cache.
+        PLAN_CACHE_TTL_SECONDS (int): How long a cached plan may be served after it was generated.
+        PLAN_CACHE_MAX_ENTRIES (int): Cached plans kept; the least recently used are evicted beyond it.
+        PLAN_CACHE_SIMILARITY (float): Minimum trigram similarity (0-1) for a near-match hit;
+            1.0 allows exact normalized matches only.
+        AI_JOB_WORKERS (int): Background workers generating AI plans for /ask_ai/jobs.
+        AI_JOB_QUEUE_SIZE (int): AI plan jobs allowed to wait before new ones are refused with 503.
+        AI_JOB_RESULT_TTL_SECONDS (int): How long a finished AI plan job stays retrievable.
+        PAGES_WATCH (bool): Reload cached HTML pages when their files change (development).
+        ASSETS_FINGERPRINT (bool): Serve CSS and JS under content-hashed /assets URLs with
+            immutable caching; turn off in development so edits under src/ apply without a restart.
+        ASSETS_BUILD_DIR (str): Directory, relative to the project root, for fingerprinted assets.
+        RATE_LIMIT_ENABLED (bool): Enforce server-side rate limits.
+        RATE_LIMIT_BACKEND (str): Token bucket storage; "memory" limits each process separately.
+        RATE_LIMIT_MAX_KEYS (int): Token buckets the memory backend keeps before dropping idle ones.
+        RATE_LIMIT_LOGIN (str): Login attempts allowed per client IP, e.g. "10/minute".
+        RATE_LIMIT_REGISTER (str): Registrations allowed per client IP.
+        RATE_LIMIT_AI (str): AI plan requests allowed per user, across all /ask_ai endpoints.
+        RATE_LIMIT_DEFAULT (str): Requests allowed per user (or IP) on every other API route.
+        RATE_LIMIT_FORWARDED_HEADER (Optional[str]): Header carrying the client IP when behind a
+            trusted proxy, e.g. "X-Forwarded-For"; unset uses the connection's address.
+        RATE_LIMIT_TRUSTED_HOPS (int): Trusted proxies that append to the forwarded header; the
+            client is the address added by the outermost of them, counted from the right.
+        QUERY_DETECTOR_ENABLED (bool): Analyze each request's queries and log N+1 patterns, slow
+            statements and exceeded budgets (development and CI).
+        QUERY_SLOW_MS (float): Statement time above which a query is reported as slow.
+        QUERY_REPEAT_THRESHOLD (int): Executions of one statement shape (or lazy loads of one
+            relationship) within a request that are reported as a possible N+1.
+        QUERY_BUDGETS (Dict[str, int]): Maximum queries per endpoint, keyed like
+            "GET /planner/goals"; given as JSON in the environment.
+        PROFILE_SAMPLE_RATE (float): Fraction of requests run under the sampling profiler (0-1).
+        PROFILE_ADMIN_TOKEN (Optional[str]): Secret that, sent in an X-Profile header, profiles
+            that request; unset disables header-triggered profiling.
+        PROFILE_INTERVAL_MS (float): Time between stack samples of a profiled request.
+        PROFILE_MAX_CONCURRENT (int): Requests profiled at once; others run unprofiled.
+        PROFILE_MAX_SAMPLES (int): Samples kept per request; sampling stops beyond it.
+        PROFILE_DIR (str): Directory, relative to the project root, for stored profiles.
+        PROFILE_KEEP (int): Stored profiles kept; the oldest are deleted beyond it.
+        LOG_LEVEL (str): Minimum level of records logged, e.g. "INFO".
+        LOG_FORMAT (str): "json" for one JSON object per record, or "text".
+        LOG_QUEUE_SIZE (int): Records waiting to be written before new ones are dropped.
+        LOG_INFO_SAMPLE_RATE (float): Fraction of INFO and DEBUG records logged while handling
+            a request that are kept (0-1); warnings and errors are always kept.
+        LOG_ACCESS (bool): Log one record per request with its status, duration and user.
     """
     DATABASE_URL: str = "sqlite:///./database.db"
+    ASYNC_DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE_KB: int = 65536
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    USER_CACHE_MAX_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+    TOKEN_CACHE_MAX_SIZE: int = 4096
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    BCRYPT_WORKERS: Optional[int] = None
+    BCRYPT_MAX_PENDING: int = 16
+    BCRYPT_TARGET_MS: int = 250
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 15
+    BCRYPT_ROUNDS: Optional[int] = None
+    AI_BACKEND: str = "gemini"
+    GEMINI_API_KEY: Optional[str] = None
+    GEMINI_MODEL: str = "gemini-2.0-flash"
+    AI_MAX_CONCURRENCY: int = 8
+    AI_TIMEOUT_SECONDS: float = 30.0
+    AI_DEADLINE_SECONDS: float = 60.0
+    AI_MAX_RETRIES: int = 2
+    AI_RETRY_BASE_SECONDS: float = 0.5
+    AI_RETRY_MAX_SECONDS: float = 8.0
+    AI_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    AI_CIRCUIT_RESET_SECONDS: float = 30.0
+    AI_STUB_LATENCY_MS: float = 200.0
+    AI_STUB_FAILURE_RATE: float = 0.0
+    PLAN_CACHE_ENABLED: bool = True
+    PLAN_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    PLAN_CACHE_MAX_ENTRIES: int = 5000
+    PLAN_CACHE_SIMILARITY: float = 0.8
+    AI_JOB_WORKERS: int = 4
+    AI_JOB_QUEUE_SIZE: int = 100
+    AI_JOB_RESULT_TTL_SECONDS: int = 600
+    PAGES_WATCH: bool = False
+    ASSETS_FINGERPRINT: bool = True
+    ASSETS_BUILD_DIR: str = "build/assets"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_REGISTER: str = "5/minute"
+    RATE_LIMIT_AI: str = "10/minute"
+    RATE_LIMIT_DEFAULT: str = "300/minute"
+    RATE_LIMIT_FORWARDED_HEADER: Optional[str] = None
+    RATE_LIMIT_TRUSTED_HOPS: int = 1
+    QUERY_DETECTOR_ENABLED: bool = False
+    QUERY_SLOW_MS: float = 100.0
+    QUERY_REPEAT_THRESHOLD: int = 5
+    QUERY_BUDGETS: Dict[str, int] = {}
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_ADMIN_TOKEN: Optional[str] = None
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_CONCURRENT: int = 2
+    PROFILE_MAX_SAMPLES: int = 20000
+    PROFILE_DIR: str = "build/profiles"
+    PROFILE_KEEP: int = 200
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_INFO_SAMPLE_RATE: float = 1.0
+    LOG_ACCESS: bool = True
 
     class Config:
         """
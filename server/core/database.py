@@ -1,25 +1,224 @@
 """
 This module handles database configuration, session management, and utility functions
 for creating and dropping database tables.
+
+Both engines use a bounded connection pool configured from Settings, and SQLite
+connections are tuned with PRAGMAs on connect (WAL journal, relaxed fsync,
+memory-mapped I/O, a larger page cache and a busy timeout) so concurrent writes
+wait briefly instead of failing with "database is locked".
 """
 
-from typing import Generator  # Standard library imports
+import logging  # Standard library imports
+import time  # Standard library imports
+from contextlib import nullcontext  # Standard library imports
+from typing import AsyncGenerator, Dict, Generator, List, Union  # Standard library imports
 from sqlmodel import SQLModel, create_engine  # Third-party imports
+from sqlalchemy import event, inspect, text  # Third-party imports
+from sqlalchemy.engine import Connection, Engine  # Third-party imports
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # Third-party imports
 from sqlalchemy.orm import sessionmaker, Session  # Third-party imports
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool  # Third-party imports
 from server.core.config import settings  # First-party imports
+from server.core.instrumentation import record_timing  # First-party imports
+from server.core.metrics import registry  # First-party imports
+from server.core.querywatch import observe_query  # First-party imports
+
+logger = logging.getLogger(__name__)
+
+_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection, by engine"
+)
+_checked_out = registry.gauge(
+    "db_pool_checked_out", "Database connections currently checked out of the pool, by engine"
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection."""
+    engine_label = "sync"
+    # Log under SQLAlchemy's pool logger, not this module's, so SQLAlchemy's log level applies
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _checkout_wait.observe(time.perf_counter() - start, engine=self.engine_label)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waits for a connection."""
+    engine_label = "async"
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _checkout_wait.observe(time.perf_counter() - start, engine=self.engine_label)
+
+
+def async_database_url(url: str) -> str:
+    """
+    Derive the async driver URL for a synchronous database URL.
+
+    SQLite uses aiosqlite and PostgreSQL uses asyncpg; URLs that already name a
+    driver are returned unchanged.
+
+    Args:
+        url: Synchronous SQLAlchemy database URL
+
+    Returns:
+        Database URL for the async engine
+    """
+    for prefix, async_prefix in (
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _engine_options(url: str, poolclass) -> dict:
+    """
+    Build pool and driver options for an engine from Settings.
+
+    In-memory SQLite keeps SQLAlchemy's default single-connection pool, since
+    every new connection would otherwise see an empty database.
+    """
+    options = {}
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+        if ":memory:" in url or url.rstrip("/").endswith(":"):
+            return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def _instrument(sync_engine: Engine, label: str, url: str):
+    """Attach connection tuning, pool usage tracking and per-request query timing and analysis to an engine."""
+    if _is_sqlite(url):
+        @event.listens_for(sync_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, _connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+            # Negative cache_size is in KiB rather than pages
+            cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+            cursor.close()
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(_conn, _cursor, _statement, _parameters, context, _executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(_conn, _cursor, statement, _parameters, context, _executemany):
+        started = getattr(context, "_query_started", None)
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            record_timing("db", elapsed)
+            observe_query(statement, elapsed)
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(*_args):
+        _checked_out.inc(engine=label)
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(*_args):
+        _checked_out.dec(engine=label)
+
+
+engine = create_engine(
+    settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL, InstrumentedQueuePool)
+)
+_instrument(engine, "sync", settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    _async_url, **_engine_options(_async_url, InstrumentedAsyncQueuePool)
+)
+_instrument(async_engine.sync_engine, "async", _async_url)
+# Objects stay usable after commit: async sessions cannot lazily reload expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def create_db_and_tables():
     """
     Creates the database and all defined tables.
     """
-    print("Creating database and tables...")
+    logger.info("Creating database and tables...")
     SQLModel.metadata.create_all(bind=engine)
 
 
+def add_missing_columns(
+    bind: Union[Engine, Connection], table_name: str, columns: Dict[str, str]
+) -> List[str]:
+    """
+    Add columns introduced after a table was created; create_all only creates missing tables.
+
+    Args:
+        bind: Sync engine of the database, or a connection whose transaction
+            the columns are added in
+        table_name: Table to extend; nothing happens if it does not exist yet
+        columns: Column name to its SQL type and constraints, e.g. "INTEGER NOT NULL DEFAULT 0"
+
+    Returns:
+        Names of the columns that were added
+    """
+    inspector = inspect(bind)
+    if not inspector.has_table(table_name):
+        return []
+    existing = {column["name"] for column in inspector.get_columns(table_name)}
+    missing = [name for name in columns if name not in existing]
+    with bind.begin() if isinstance(bind, Engine) else nullcontext(bind) as connection:
+        for name in missing:
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {columns[name]}"))
+    return missing
+
+
+def create_missing_indexes(bind: Engine) -> List[str]:
+    """
+    Create model indexes missing from tables that already exist; create_all
+    skips existing tables, indexes included.
+
+    Args:
+        bind: Sync engine of the database
+
+    Returns:
+        Names of the indexes that were created
+    """
+    inspector = inspect(bind)
+    created = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind, checkfirst=True)
+                created.append(index.name)
+    return created
+
+
 def drop_db_and_tables():
     """
     Drops all tables in the database.
@@ -39,3 +238,14 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Provides an async database session generator for dependency injection.
+
+    Yields:
+        AsyncSession: An async database session.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,67 @@
+"""
+Strong ETags and conditional GET helpers.
+
+Endpoints derive an ETag from a cheap version stamp (such as a goal's revision)
+plus whatever else shapes the response (pagination parameters), check it
+against If-None-Match before building the body, and answer 304 Not Modified on
+a match. Responses carry "Cache-Control: private, no-cache", so browsers keep
+the body but revalidate it on every use; fetch() then turns a 304 into the
+cached 200 transparently.
+"""
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from the values that determine a response.
+
+    Args:
+        *parts: Version stamps and parameters; converted with str()
+
+    Returns:
+        Quoted ETag value
+    """
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """
+    Check whether the client already holds the representation with this ETag.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the client's copy is current
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Return an empty 304 response for a resource whose ETag matched."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    """Attach the ETag and revalidation headers to a full response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
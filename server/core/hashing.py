@@ -0,0 +1,329 @@
+"""
+Password hashing on a dedicated, size-limited process pool.
+
+bcrypt is deliberately slow and CPU-bound. Running it in request threads lets a
+login burst occupy the whole threadpool, starving every other sync endpoint.
+Work is instead sent to a small process pool that spreads hashing over all cores
+outside the GIL. Admission is bounded: once the pool's workers and waiting queue
+are full, new requests are refused at once with 503 instead of piling up.
+
+The bcrypt cost factor is calibrated at startup so one hash takes roughly
+BCRYPT_TARGET_MS on this hardware; hashes made with an older cost or scheme are
+upgraded on the next successful login. Run ``python -m server.core.hashing`` to
+print the measured time per cost factor.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from .config import settings
+from .instrumentation import record_timing
+from .metrics import registry
+
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_queue_depth = registry.gauge(
+    "bcrypt_queue_depth", "Password hashing jobs admitted to the pool and not yet finished"
+)
+_rejections = registry.counter(
+    "bcrypt_rejections_total", "Password hashing jobs refused because the pool queue was full"
+)
+_hash_seconds = registry.histogram(
+    "bcrypt_hash_seconds", "Time spent inside bcrypt in a pool worker, by operation"
+)
+_wait_seconds = registry.histogram(
+    "bcrypt_wait_seconds", "Time a password hashing job waited for a free pool worker, by operation"
+)
+
+
+def _timed(operation: Callable, *args):
+    """Run a hashing operation in a worker and report how long bcrypt itself took."""
+    start = time.perf_counter()
+    result = operation(*args)
+    return result, time.perf_counter() - start
+
+
+def _hash(password: str, rounds: int) -> str:
+    return pwd_context.handler("bcrypt").using(rounds=rounds).hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingPool:
+    """
+    Process pool for password hashing with a bounded admission queue.
+
+    Attributes:
+        max_workers (int): Number of worker processes.
+        max_pending (int): Jobs allowed to wait for a worker before new ones are refused.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the server process runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def submit(self, operation: Callable, *args) -> Future:
+        """
+        Queue a hashing operation on the pool.
+
+        Args:
+            operation: Module-level function to run in a worker
+            *args: Arguments for the operation
+
+        Returns:
+            Future resolving to the operation's result
+
+        Raises:
+            HTTPException: 503 if the pool's queue is full
+        """
+        if not self._slots.acquire(blocking=False):
+            _rejections.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly.",
+                headers={"Retry-After": "1"}
+            )
+
+        _queue_depth.inc()
+        name = operation.__name__.lstrip("_")
+        submitted_at = time.perf_counter()
+        try:
+            inner = self._get_executor().submit(_timed, operation, *args)
+        except Exception:
+            self._slots.release()
+            _queue_depth.dec()
+            raise
+
+        outer: Future = Future()
+
+        def _done(finished: Future):
+            self._slots.release()
+            _queue_depth.dec()
+            try:
+                result, hash_seconds = finished.result()
+            except BaseException as exc:  # pylint: disable=broad-except
+                outer.set_exception(exc)
+                return
+            _hash_seconds.observe(hash_seconds, operation=name)
+            _wait_seconds.observe(
+                max(time.perf_counter() - submitted_at - hash_seconds, 0.0), operation=name
+            )
+            outer.set_result(result)
+
+        inner.add_done_callback(_done)
+        return outer
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, if they were started."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# Cost factor for new hashes; replaced by configure_hashing() at startup
+_rounds = pwd_context.handler("bcrypt").default_rounds
+
+hashing_pool = HashingPool(
+    max_workers=settings.BCRYPT_WORKERS or os.cpu_count() or 1,
+    max_pending=settings.BCRYPT_MAX_PENDING
+)
+
+
+def measure_rounds(rounds: int, samples: int = 3) -> float:
+    """
+    Measure how long one bcrypt hash takes at a given cost factor.
+
+    Args:
+        rounds: bcrypt cost factor (log2 of the iteration count)
+        samples: Number of hashes to time; the fastest is reported
+
+    Returns:
+        Seconds per hash
+    """
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash("calibration-password")
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """
+    Pick the highest bcrypt cost whose hash time stays within a target.
+
+    Each extra round doubles the work, so the time at min_rounds is enough to
+    extrapolate the rest.
+
+    Args:
+        target_ms: Target time for one hash or verification, in milliseconds
+        min_rounds: Lowest cost factor allowed
+        max_rounds: Highest cost factor allowed
+
+    Returns:
+        The chosen cost factor
+    """
+    base_ms = measure_rounds(min_rounds) * 1000
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+def configure_hashing() -> int:
+    """
+    Set the bcrypt cost used for new hashes and the minimum accepted on login.
+
+    Uses BCRYPT_ROUNDS when set, otherwise calibrates against BCRYPT_TARGET_MS.
+    Hashes below the chosen cost, or using another bcrypt variant, are then
+    reported by needs_rehash.
+
+    Returns:
+        The cost factor in effect
+    """
+    global _rounds  # pylint: disable=global-statement
+    _rounds = settings.BCRYPT_ROUNDS or calibrate_rounds(
+        settings.BCRYPT_TARGET_MS, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS
+    )
+    pwd_context.update(bcrypt__default_rounds=_rounds, bcrypt__min_rounds=_rounds)
+    return _rounds
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a stored hash uses an outdated cost factor or scheme.
+
+    Args:
+        hashed_password: Hash read from the database
+
+    Returns:
+        True if the password should be rehashed with the current settings
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password using bcrypt on the hashing pool.
+
+    Args:
+        password: Plain text password to hash
+
+    Returns:
+        Securely hashed password
+
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    return hashing_pool.submit(_hash, password, _rounds).result()
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash on the hashing pool.
+
+    Args:
+        plain_password: Plain text password to check
+        hashed_password: Hashed password to compare against
+
+    Returns:
+        True if password matches, False otherwise
+
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    return hashing_pool.submit(_verify, plain_password, hashed_password).result()
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the hashing pool without blocking the event loop.
+
+    Args:
+        password: Plain text password to hash
+
+    Returns:
+        Securely hashed password
+
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    start = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(hashing_pool.submit(_hash, password, _rounds))
+    finally:
+        record_timing("bcrypt", time.perf_counter() - start)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool without blocking the event loop.
+
+    Args:
+        plain_password: Plain text password to check
+        hashed_password: Hashed password to compare against
+
+    Returns:
+        True if password matches, False otherwise
+
+    Raises:
+        HTTPException: 503 if the hashing pool is saturated
+    """
+    start = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(
+            hashing_pool.submit(_verify, plain_password, hashed_password)
+        )
+    finally:
+        record_timing("bcrypt", time.perf_counter() - start)
+
+
+def main():
+    """Print the measured bcrypt time per cost factor and the cost calibration would pick."""
+    parser = argparse.ArgumentParser(description="Measure bcrypt timings per cost factor.")
+    parser.add_argument("--min-rounds", type=int, default=settings.BCRYPT_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=settings.BCRYPT_MAX_ROUNDS)
+    parser.add_argument("--target-ms", type=float, default=settings.BCRYPT_TARGET_MS)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rounds':>6}  {'ms/hash':>10}  {'hashes/s/core':>14}")
+    chosen = args.min_rounds
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        seconds = measure_rounds(rounds, args.samples)
+        if seconds * 1000 <= args.target_ms:
+            chosen = rounds
+        print(f"{rounds:>6}  {seconds * 1000:>10.1f}  {1 / seconds:>14.1f}")
+    print(f"target {args.target_ms:.0f} ms -> rounds {chosen}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Per-request performance instrumentation.
+
+RequestMetricsMiddleware times every HTTP request into per-route latency
+histograms, tracks requests in flight, and opens a RequestTimings for the
+request in a context variable. Components that do slow work on a request's
+behalf (database queries, bcrypt, AI calls) report it with record_timing(), so
+each response carries a Server-Timing header breaking its latency down, e.g.
+
+    Server-Timing: db;dur=4.1;desc="3 queries", bcrypt;dur=248.0, app;dur=255.3
+
+and the per-request query count and database time feed histograms of their
+own. Every response also carries an X-Request-ID, taken from the request when
+the client sent a sane one. With LOG_ACCESS set, each request is also logged
+to the "server.access" logger with its status, duration and database usage.
+"""
+
+import logging
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from .config import settings
+from .metrics import registry
+
+access_logger = logging.getLogger("server.access")
+
+_requests_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being processed")
+_request_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending its response headers, by method, route and status"
+)
+_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Database time spent by one request, by route"
+)
+_request_queries = registry.histogram(
+    "http_request_db_queries", "Database queries issued by one request, by route",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+)
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+# Set by get_current_user once the caller is authenticated
+user_id_var: ContextVar[Optional[str]] = ContextVar("user_id", default=None)
+_timings_var: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class RequestTimings:
+    """
+    Time spent by one request in each kind of work.
+
+    The object is shared, not copied, by everything running in the request's
+    context, including sync endpoints in the threadpool and SQLAlchemy's
+    greenlets, so their reports all land here.
+
+    Attributes:
+        seconds (dict): Total seconds by kind of work ("db", "bcrypt", "ai").
+        counts (dict): Number of operations by kind of work.
+    """
+
+    __slots__ = ("seconds", "counts")
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add one operation of the given kind."""
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Format the timings, plus the request's total, as a Server-Timing header value."""
+        entries = []
+        for name, seconds in self.seconds.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if name == "db":
+                entry += f';desc="{self.counts[name]} queries"'
+            entries.append(entry)
+        entries.append(f"app;dur={total_seconds * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """
+    Attribute work to the current request, if there is one.
+
+    Args:
+        name: Kind of work, used as the Server-Timing metric name
+        seconds: Time it took
+    """
+    timings = _timings_var.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+def current_request_id() -> Optional[str]:
+    """Return the id of the request being handled, or None outside a request."""
+    return request_id_var.get()
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording request latency, in-flight count and per-request
+    database usage, and adding Server-Timing and X-Request-ID headers.
+
+    Routes are labelled by their path template (e.g. /planner/goal/{goal_id}),
+    so metrics stay bounded however many ids are requested; requests that
+    match no route (404s, or refused before routing) are labelled "unmatched".
+    """
+
+    def __init__(self, app, access_log: Optional[bool] = None):
+        self.app = app
+        self.access_log = settings.LOG_ACCESS if access_log is None else access_log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _REQUEST_ID.fullmatch(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        timings = RequestTimings()
+        request_token = request_id_var.set(request_id)
+        user_token = user_id_var.set(None)
+        timings_token = _timings_var.set(timings)
+        method = scope["method"]
+        start = time.perf_counter()
+        status = None
+        _requests_in_flight.inc()
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing(elapsed).encode("latin-1")))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+                _request_seconds.observe(elapsed, method=method, route=route_label(scope), status=status)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _requests_in_flight.dec()
+            route = route_label(scope)
+            if status is None:
+                # An unhandled exception: the server error handler outside us sends the 500
+                status = 500
+                _request_seconds.observe(time.perf_counter() - start, method=method, route=route, status=status)
+            _request_queries.observe(timings.counts.get("db", 0), route=route)
+            _request_db_seconds.observe(timings.seconds.get("db", 0.0), route=route)
+            if self.access_log:
+                access_logger.info(
+                    "%s %s %s", method, route, status,
+                    extra={"method": method, "route": route, "status": status,
+                           "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                           "db_queries": timings.counts.get("db", 0)}
+                )
+            _timings_var.reset(timings_token)
+            user_id_var.reset(user_token)
+            request_id_var.reset(request_token)
+
+
+def route_label(scope) -> str:
+    """
+    Return the matched route's path template, e.g. /planner/goal/{goal_id}.
+
+    The template comes from the route Starlette stores in the scope. Routes of
+    a router included with a prefix carry their template without it, so the
+    prefix is taken from the request path: the part before the suffix that the
+    route's own pattern matches with the request's path parameters.
+    """
+    route = scope.get("route")
+    if route is None:
+        # Mounted apps (static files) only leave their mount point behind
+        mount = scope.get("root_path", "")[len(scope.get("app_root_path", "")):]
+        return f"{mount}/{{path}}" if mount else "unmatched"
+    template = getattr(route, "path", None)
+    pattern = getattr(route, "path_regex", None)
+    if template is None or pattern is None:
+        return "unmatched"
+    path = scope["path"]
+    params = {name: str(value) for name, value in scope.get("path_params", {}).items()}
+    for start, char in enumerate(path):
+        if char == "/":
+            match = pattern.match(path[start:])
+            if match is not None and match.groupdict() == params:
+                return path[:start] + template
+    return template
@@ -0,0 +1,262 @@
+"""
+In-process background job queue.
+
+Slow work (such as AI plan generation) is submitted as a Job and answered with
+its id at once; a fixed pool of asyncio workers drains the queue and records
+each job's outcome, which clients poll or follow as server-sent events. A job
+submitted with the same dedup key as one still queued or running is answered
+with that job instead of being queued twice.
+
+Jobs live in memory: they are lost on restart, and with several server
+processes a job is only visible to the process that accepted it. Finished jobs
+are kept for result_ttl_seconds so clients can collect the outcome.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_queue_depth = registry.gauge("job_queue_depth", "Jobs waiting for a worker, by queue")
+_running = registry.gauge("jobs_running", "Jobs being processed by a worker, by queue")
+_jobs = registry.counter("jobs_total", "Finished jobs, by queue and outcome")
+_deduplicated = registry.counter(
+    "jobs_deduplicated_total", "Submissions answered with an identical job already in progress"
+)
+_rejected = registry.counter("jobs_rejected_total", "Submissions refused because the queue was full")
+_job_buckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+_wait_seconds = registry.histogram(
+    "job_wait_seconds", "Time a job waited in the queue before a worker took it", buckets=_job_buckets
+)
+_run_seconds = registry.histogram(
+    "job_run_seconds", "Time a worker spent processing a job", buckets=_job_buckets
+)
+
+
+class Job:
+    """
+    One unit of background work and its outcome.
+
+    Attributes:
+        id (str): Job identifier returned to the client.
+        owner_id: Identifier of the user who submitted the job.
+        params (dict): Arguments for the queue's handler.
+        status (str): "queued", "running", "succeeded" or "failed".
+        result: Handler return value once succeeded.
+        error (dict): {"status_code", "detail"} once failed.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, owner_id, params: dict, dedup_key: Optional[Hashable] = None):
+        self.id = uuid.uuid4().hex
+        self.owner_id = owner_id
+        self.params = params
+        self.dedup_key = dedup_key
+        self.status = self.QUEUED
+        self.result = None
+        self.error: Optional[dict] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._enqueued = time.perf_counter()
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        """True once the job has succeeded or failed."""
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def _set_status(self, new_status: str) -> None:
+        self.status = new_status
+        # Wake everyone waiting for a change, then arm a fresh event for the next one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """
+        Wait until the job's status changes.
+
+        Args:
+            timeout: Seconds to wait at most
+
+        Returns:
+            True if the status changed, False on timeout
+        """
+        if self.finished:
+            return False
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class JobQueue:
+    """
+    Bounded queue of jobs processed by a pool of asyncio workers.
+
+    Attributes:
+        name (str): Queue name used in metrics and logs.
+        handler: Coroutine function run with each Job; its return value becomes the result.
+        workers (int): Number of worker tasks.
+        max_size (int): Jobs allowed to wait before submissions are refused with 503.
+        result_ttl_seconds (float): How long finished jobs stay retrievable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Job], Awaitable],
+        workers: int,
+        max_size: int,
+        result_ttl_seconds: float
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self.result_ttl_seconds = result_ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[Hashable, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the worker tasks and the sweeper of expired jobs on the running event loop."""
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{index}")
+            for index in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweeper(), name=f"{self.name}-sweeper"))
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued and running jobs are abandoned."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, owner_id, params: dict, dedup_key: Optional[Hashable] = None) -> Tuple[Job, bool]:
+        """
+        Queue a job, or return the identical one already queued or running.
+
+        Args:
+            owner_id: User submitting the job
+            params: Arguments for the handler
+            dedup_key: Jobs with equal keys are not queued twice while one is unfinished
+
+        Returns:
+            The job and whether it was newly created
+
+        Raises:
+            HTTPException: 503 if the queue is full or not started
+        """
+        self._sweep()
+        if dedup_key is not None and dedup_key in self._active:
+            _deduplicated.inc(queue=self.name)
+            return self._active[dedup_key], False
+
+        if self._queue is None or not self._tasks:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Background processing is not running."
+            )
+
+        job = Job(owner_id, params, dedup_key)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            _rejected.inc(queue=self.name)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly.",
+                headers={"Retry-After": "5"}
+            )
+
+        self._jobs[job.id] = job
+        if dedup_key is not None:
+            self._active[dedup_key] = job
+        _queue_depth.set(self._queue.qsize(), queue=self.name)
+        return job, True
+
+    def get(self, job_id: str, owner_id=None) -> Optional[Job]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job identifier
+            owner_id: When given, jobs of other users are treated as missing
+
+        Returns:
+            The job, or None if unknown, expired or not owned
+        """
+        job = self._jobs.get(job_id)
+        if job is None or (owner_id is not None and job.owner_id != owner_id):
+            return None
+        if self._expired(job, datetime.now(timezone.utc)):
+            del self._jobs[job_id]
+            return None
+        return job
+
+    def _expired(self, job: Job, now: datetime) -> bool:
+        return job.finished and (now - job.finished_at).total_seconds() > self.result_ttl_seconds
+
+    def _sweep(self) -> None:
+        """Forget finished jobs older than result_ttl_seconds."""
+        now = datetime.now(timezone.utc)
+        expired = [job_id for job_id, job in self._jobs.items() if self._expired(job, now)]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _sweeper(self) -> None:
+        # Frees expired results even when no new jobs arrive to trigger a sweep
+        while True:
+            await asyncio.sleep(max(self.result_ttl_seconds / 2, 1))
+            self._sweep()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            _queue_depth.set(self._queue.qsize(), queue=self.name)
+            _wait_seconds.observe(time.perf_counter() - job._enqueued, queue=self.name)
+            job.started_at = datetime.now(timezone.utc)
+            job._set_status(Job.RUNNING)
+            _running.inc(queue=self.name)
+            start = time.perf_counter()
+            try:
+                job.result = await self.handler(job)
+                outcome = Job.SUCCEEDED
+            except HTTPException as e:
+                job.error = {"status_code": e.status_code, "detail": e.detail}
+                outcome = Job.FAILED
+            except asyncio.CancelledError:
+                job.error = {"status_code": 503, "detail": "The server stopped before the job finished."}
+                job.finished_at = datetime.now(timezone.utc)
+                job._set_status(Job.FAILED)
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception("Job %s on queue %s failed: %s", job.id, self.name, e)
+                job.error = {"status_code": 500, "detail": "The job failed unexpectedly."}
+                outcome = Job.FAILED
+            finally:
+                _running.dec(queue=self.name)
+                _run_seconds.observe(time.perf_counter() - start, queue=self.name)
+                job.finished_at = datetime.now(timezone.utc)
+                if job.dedup_key is not None and self._active.get(job.dedup_key) is job:
+                    del self._active[job.dedup_key]
+                self._queue.task_done()
+            _jobs.inc(queue=self.name, outcome=outcome)
+            job._set_status(outcome)
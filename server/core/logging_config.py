@@ -0,0 +1,154 @@
+"""
+Non-blocking, structured logging.
+
+configure_logging() replaces the root logger's handlers with a QueueHandler.
+Code on the request path only puts the record on a bounded in-memory queue,
+and a QueueListener thread formats it and writes it to stderr. Records are
+never waited on: when the queue is full they are dropped and counted in
+logs_dropped_total.
+
+Records are formatted as one JSON object per line (LOG_FORMAT="json"), or as
+plain text for development (LOG_FORMAT="text"). Each record carries the id of
+the request it was logged for and the authenticated user, captured on the
+logging thread before it is queued, plus any fields passed in extra=:
+
+    {"time": "2026-10-17T09:12:03.512Z", "level": "INFO", "logger": "server.access",
+     "message": "GET /planner/goals 200", "request_id": "5f0c...", "user_id": "8d2e...",
+     "method": "GET", "route": "/planner/goals", "status": 200, "duration_ms": 12.4}
+
+Log with %-style arguments, logger.info("Deleted task %s", task_id), so the
+message is only formatted for records that are kept. INFO and DEBUG records
+logged while handling a request are kept at LOG_INFO_SAMPLE_RATE, and sampled
+records carry the rate so counts can be scaled back up; warnings, errors and
+records logged outside requests are always kept.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from .config import settings
+from .instrumentation import request_id_var, user_id_var
+from .metrics import registry
+
+_dropped = registry.counter("logs_dropped_total", "Log records dropped because the log queue was full")
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "taskName"
+}
+
+_listener: Optional[QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamp records with the current request and user ids, and sample request-path INFO records.
+
+    Runs on the thread that logs, where the request's context variables are
+    visible, before the record is handed to the listener thread.
+
+    Attributes:
+        info_sample_rate (float): Fraction of request-path INFO and DEBUG records kept.
+    """
+
+    def __init__(self, info_sample_rate: float = 1.0):
+        super().__init__()
+        self.info_sample_rate = info_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.user_id = user_id_var.get()
+        if record.request_id is not None and record.levelno <= logging.INFO and self.info_sample_rate < 1:
+            if random.random() >= self.info_sample_rate:
+                return False
+            record.sample_rate = self.info_sample_rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects, including fields passed in extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking or raising when the queue is full."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now, while the arguments still hold their values;
+        # formatting the record and writing it out are left to the listener thread
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def configure_logging() -> QueueListener:
+    """
+    Route all logging through a bounded queue to a background listener thread.
+
+    Safe to call more than once; later calls return the running listener.
+
+    Returns:
+        The listener writing queued records to stderr
+    """
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(sys.stderr)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+        )
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter(settings.LOG_INFO_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    # SQLAlchemy logs pool and engine events at INFO; keep them out unless asked for with echo
+    logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+
+    _listener = QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,237 @@
+"""
+In-process metrics shared by the application's components.
+
+Components register named counters, gauges and histograms on the module-level
+registry and update them as they run; the registry can then be dumped as a
+JSON snapshot or in the Prometheus text exposition format. Every update takes a short lock, so metrics
+are safe to touch from the threadpool that runs sync endpoints.
+"""
+
+import bisect
+import threading
+from typing import Dict, Sequence, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Upper bounds (seconds) suited to request, query and hashing latencies
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    """
+    Base class for a metric family: one value per distinct set of labels.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): A one-line description of what is measured.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels: Dict[str, object]) -> LabelKey:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def value(self, **labels) -> float:
+        """Return the current value for the given labels (0 if never set)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Dict[LabelKey, float]:
+        """Return a copy of all label sets and their values."""
+        with self._lock:
+            return dict(self._values)
+
+
+class Counter(Metric):
+    """A monotonically increasing count, such as cache hits."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increase the counter for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """A value that can go up and down, such as the number of cached entries."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increase the gauge for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        """Decrease the gauge for the given labels."""
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """
+    A distribution of observed values, such as latencies, counted into buckets.
+
+    Each label set holds cumulative bucket counts plus the sum and count of all
+    observations, the same shape Prometheus histograms use.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation for the given labels."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._values[key] = state
+            state["counts"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def value(self, **labels) -> dict:
+        """Return the cumulative buckets, sum and count for the given labels."""
+        with self._lock:
+            return self._summarize(self._values.get(self._key(labels)))
+
+    def samples(self) -> Dict[LabelKey, dict]:
+        """Return the cumulative buckets, sum and count for every label set."""
+        with self._lock:
+            return {key: self._summarize(state) for key, state in self._values.items()}
+
+    def _summarize(self, state) -> dict:
+        counts = state["counts"] if state else [0] * (len(self.buckets) + 1)
+        cumulative, running = {}, 0
+        for bound, count in zip(list(self.buckets) + [float("inf")], counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {
+            "buckets": cumulative,
+            "sum": state["sum"] if state else 0.0,
+            "count": state["count"] if state else 0,
+        }
+
+
+class MetricsRegistry:
+    """Holds every metric family by name so it can be reported in one place."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, documentation: str, **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, documentation, **options)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        """Return the counter with this name, creating it on first use."""
+        return self._register(Counter, name, documentation)
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        """Return the gauge with this name, creating it on first use."""
+        return self._register(Gauge, name, documentation)
+
+    def histogram(
+        self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Return the histogram with this name, creating it on first use."""
+        metric = self._register(Histogram, name, documentation, buckets=buckets)
+        if metric.buckets != tuple(sorted(buckets)):
+            raise ValueError(f"Histogram {name} is already registered with other buckets")
+        return metric
+
+    def metrics(self):
+        """Return all registered metric families, sorted by name."""
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def snapshot(self) -> dict:
+        """
+        Return every metric as a JSON-serializable dictionary.
+
+        Returns:
+            Mapping of metric name to its type, description and labelled samples
+        """
+        return {
+            metric.name: {
+                "type": metric.kind,
+                "help": metric.documentation,
+                "samples": [
+                    {"labels": dict(labels), "value": value}
+                    for labels, value in metric.samples().items()
+                ],
+            }
+            for metric in self.metrics()
+        }
+
+    def render_prometheus(self) -> str:
+        """
+        Return every metric in the Prometheus text exposition format (version 0.0.4).
+
+        Returns:
+            The exposition text, ending with a newline
+        """
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in sorted(metric.samples().items()):
+                if isinstance(metric, Histogram):
+                    for bound, count in value["buckets"].items():
+                        lines.append(
+                            f"{metric.name}_bucket{_format_labels(labels + (('le', bound),))} {count}"
+                        )
+                    lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+                    lines.append(f"{metric.name}_count{_format_labels(labels)} {value['count']}")
+                else:
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    return repr(float(value))
+
+
+registry = MetricsRegistry()
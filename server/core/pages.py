@@ -0,0 +1,188 @@
+"""
+In-memory cache of the static HTML pages.
+
+Each page under src/pages is read once, compressed once with gzip (and brotli
+when the brotli package is installed) and kept in memory together with a
+strong ETag per encoding, so serving it costs a dict lookup. Responses pick the
+smallest encoding the client accepts, answer a matching If-None-Match with 304, and
+carry "Cache-Control: no-cache" so browsers revalidate and pick up a new
+deployment at once.
+
+With PAGES_WATCH enabled (for development) each request stats the file and
+reloads the page when its mtime changed; otherwise edits need a restart.
+"""
+
+import gzip
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from fastapi import Request, Response, status
+
+from .config import settings
+from .etag import if_none_match
+from .metrics import registry
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PAGES_DIR = Path(__file__).resolve().parents[2] / "src" / "pages"
+CACHE_CONTROL = "no-cache"
+# Content codings pages and assets are precompressed with, preferred first
+CONTENT_CODINGS = ("br", "gzip")
+# Suffix distinguishing each encoded body's ETag from the identity body's
+_ETAG_SUFFIXES = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+_loads = registry.counter("page_cache_loads_total", "HTML pages read from disk and compressed, by page")
+
+
+class CachedPage:
+    """
+    One HTML page held in memory.
+
+    Attributes:
+        mtime_ns (int): Modification time of the file the page was read from.
+        variants (dict): Body bytes by content coding ("identity", "gzip", "br").
+        etags (dict): Strong ETag of each body, by content coding; strong
+            validators are byte-specific, so every encoding has its own.
+    """
+
+    def __init__(self, content: bytes, mtime_ns: int):
+        self.mtime_ns = mtime_ns
+        self.variants: Dict[str, bytes] = {
+            "identity": content,
+            "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(content, mode=brotli.MODE_TEXT)
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        self.etags = {coding: f'"{digest}{_ETAG_SUFFIXES[coding]}"' for coding in self.variants}
+
+
+def accepted_encodings(header: Optional[str]) -> set:
+    """
+    Parse an Accept-Encoding header.
+
+    Args:
+        header: Header value, or None
+
+    Returns:
+        Content codings the client accepts (q > 0), lower-cased; "*" stands
+        for every coding in CONTENT_CODINGS not listed with q=0
+    """
+    accepted, refused = set(), set()
+    wildcard = False
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    refused.add(coding)
+                    continue
+            except ValueError:
+                continue
+        if coding == "*":
+            wildcard = True
+        else:
+            accepted.add(coding)
+    if wildcard:
+        accepted.update(coding for coding in CONTENT_CODINGS if coding not in refused)
+    return accepted
+
+
+class PageCache:
+    """
+    Serves HTML pages from memory, loading each file on first use.
+
+    Attributes:
+        root (Path): Directory holding the pages.
+        watch (bool): Reload a page when its file's mtime changes.
+        transform: Applied to each page's bytes as it is loaded (e.g. to rewrite asset URLs).
+    """
+
+    def __init__(self, root: Path, watch: bool = False):
+        self.root = root
+        self.watch = watch
+        self.transform: Optional[Callable[[bytes], bytes]] = None
+        self._pages: Dict[str, CachedPage] = {}
+        self._lock = threading.Lock()
+
+    def set_transform(self, transform: Optional[Callable[[bytes], bytes]]) -> None:
+        """Set the transform applied to pages and drop the pages loaded without it."""
+        with self._lock:
+            self.transform = transform
+            self._pages.clear()
+
+    def get(self, name: str) -> Optional[CachedPage]:
+        """
+        Return a page, reading it from disk if it is not cached (or changed, when watching).
+
+        Args:
+            name: File name relative to the root
+
+        Returns:
+            The cached page, or None if the file does not exist
+        """
+        page = self._pages.get(name)
+        if page is not None and not self.watch:
+            return page
+
+        path = self.root / name
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._pages.pop(name, None)
+            return None
+        if page is not None and page.mtime_ns == mtime_ns:
+            return page
+
+        with self._lock:
+            page = self._pages.get(name)
+            if page is None or page.mtime_ns != mtime_ns:
+                content = path.read_bytes()
+                if self.transform is not None:
+                    content = self.transform(content)
+                page = CachedPage(content, mtime_ns)
+                self._pages[name] = page
+                _loads.inc(page=name)
+                logger.debug("Loaded page %s (%d bytes)", name, len(page.variants["identity"]))
+        return page
+
+    def serve(self, request: Request, name: str) -> Optional[Response]:
+        """
+        Build the response for a page, negotiating its encoding and honouring If-None-Match.
+
+        Args:
+            request: Incoming request
+            name: File name relative to the root
+
+        Returns:
+            A 200 or 304 response, or None if the page does not exist
+        """
+        page = self.get(name)
+        if page is None:
+            return None
+
+        accepted = accepted_encodings(request.headers.get("accept-encoding"))
+        coding = next((coding for coding in CONTENT_CODINGS if coding in accepted and coding in page.variants),
+                      "identity")
+        headers = {"ETag": page.etags[coding], "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if if_none_match(request, page.etags[coding]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(page.variants[coding], media_type="text/html", headers=headers)
+
+
+page_cache = PageCache(PAGES_DIR, watch=settings.PAGES_WATCH)
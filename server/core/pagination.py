@@ -0,0 +1,57 @@
+"""
+Keyset (cursor) pagination helpers shared by the listing endpoints.
+
+Cursors are opaque to clients: they carry the primary key of the last row of the
+previous page, encoded as URL-safe base64, and the next page continues with rows
+whose key sorts after it. Unlike OFFSET paging, fetching a deep page costs the
+same index seek as fetching the first one.
+"""
+
+import base64
+import binascii
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(last_id: UUID) -> str:
+    """
+    Encode the key of the last row of a page into an opaque cursor.
+
+    Args:
+        last_id: Primary key of the last row returned
+
+    Returns:
+        URL-safe cursor string
+    """
+    return base64.urlsafe_b64encode(last_id.bytes).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a previous page, or None for the first page
+
+    Returns:
+        The key to continue after, or None when no cursor was given
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return UUID(bytes=base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeEncodeError, binascii.Error) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor."
+        ) from exc
@@ -0,0 +1,279 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+ProfilingMiddleware, added when PROFILE_SAMPLE_RATE or PROFILE_ADMIN_TOKEN is
+set, picks requests to profile: a random PROFILE_SAMPLE_RATE fraction of them,
+and any request sending the admin token in an X-Profile header:
+
+    curl -H "X-Profile: $PROFILE_ADMIN_TOKEN" -H "Authorization: ..." .../planner/goals
+
+While a profiled request runs, one background thread samples the stack of the
+event loop thread every PROFILE_INTERVAL_MS. Samples taken while the request's
+own code is on that stack record where it is running; samples taken while it
+is suspended record the chain of awaits it is waiting in, ending in an
+"[await ...]" frame, so time spent waiting on the database, bcrypt or the AI
+backend shows up too. Work handed to the threadpool appears as the await on
+it. Time the loop spends on other requests is not counted.
+
+The result is written to PROFILE_DIR as <profile id>.collapsed, in the
+collapsed-stack format read by flamegraph.pl, speedscope and similar tools.
+The profile id is generated by the server, so clients cannot choose file
+names; the response's X-Profile header names it, and the log line recording
+the profile ties it to the request id. Overhead is bounded: one
+sampler thread, running only while a request is being profiled, at most
+PROFILE_MAX_CONCURRENT requests at a time and PROFILE_MAX_SAMPLES samples each.
+"""
+
+import asyncio
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+from .instrumentation import current_request_id, route_label
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+_profiles_recorded = registry.counter("profiles_recorded_total", "Requests profiled, by route")
+_profiles_skipped = registry.counter(
+    "profiles_skipped_total", "Requests picked for profiling but run unprofiled, at the concurrency limit"
+)
+
+_ROOT_PREFIX = str(PROJECT_ROOT) + os.sep
+_frame_names: Dict[object, str] = {}
+
+
+def _frame_name(frame) -> str:
+    """Name a frame's function for collapsed stacks, e.g. "get_goals (server/apps/planner/routes.py:120)"."""
+    code = frame.f_code
+    name = _frame_names.get(code)
+    if name is None:
+        filename = code.co_filename
+        if filename.startswith(_ROOT_PREFIX):
+            filename = filename[len(_ROOT_PREFIX):]
+        else:
+            # Library code: keep the package-relative tail
+            parts = Path(filename).parts
+            filename = "/".join(parts[parts.index("site-packages") + 1:] if "site-packages" in parts
+                                else parts[-2:])
+        qualname = getattr(code, "co_qualname", code.co_name)
+        name = f"{qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+        _frame_names[code] = name
+    return name
+
+
+def _awaited_by(awaitable):
+    """Return the frame suspended in an awaitable and the awaitable it waits on in turn."""
+    for frame_attr, await_attr in (("cr_frame", "cr_await"), ("gi_frame", "gi_yieldfrom"),
+                                   ("ag_frame", "ag_await")):
+        frame = getattr(awaitable, frame_attr, None)
+        if frame is not None:
+            return frame, getattr(awaitable, await_attr, None)
+    return None, None
+
+
+class RequestProfile:
+    """
+    Stack samples collected for one request.
+
+    Attributes:
+        profile_id (str): Server-generated id the profile is stored under.
+        request_id (Optional[str]): Id of the profiled request, as sent by the client or generated.
+        samples (int): Samples taken.
+        stacks (dict): Sample counts by stack, outermost frame first.
+    """
+
+    def __init__(
+        self, request_id: Optional[str], thread_id: int, frame, task: Optional[asyncio.Task], max_samples: int
+    ):
+        self.profile_id = uuid.uuid4().hex
+        self.request_id = request_id
+        self.samples = 0
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self._thread_id = thread_id
+        self._frame = frame
+        self._task = task
+        self._max_samples = max_samples
+
+    def sample(self, frames: Dict[int, object]) -> None:
+        """Record one sample from sys._current_frames()."""
+        if self.samples >= self._max_samples:
+            return
+        stack = self._running_stack(frames.get(self._thread_id))
+        if stack is None:
+            stack = self._awaiting_stack()
+        if stack:
+            key = tuple(stack)
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def _running_stack(self, frame) -> Optional[List[str]]:
+        """The request's frames on the thread's stack, or None if it is not running."""
+        names = []
+        while frame is not None:
+            names.append(_frame_name(frame))
+            if frame is self._frame:
+                names.reverse()
+                return names
+            frame = frame.f_back
+        return None
+
+    def _awaiting_stack(self) -> List[str]:
+        """The chain of awaits the suspended request waits in."""
+        if self._task is None:
+            return []
+        # Only a suspended chain exposes its awaits: walk down from the task's
+        # outermost coroutine, keeping the part from the request's frame on
+        names = []
+        awaitable = self._task.get_coro()
+        while True:
+            frame, inner = _awaited_by(awaitable)
+            if frame is None:
+                break
+            if names or frame is self._frame:
+                names.append(_frame_name(frame))
+            awaitable = inner
+        if awaitable is not None and names:
+            names.append(f"[await {type(awaitable).__name__}]")
+        return names
+
+    def collapsed(self) -> str:
+        """Format the samples as collapsed stacks, one "frame;frame;frame count" line per stack."""
+        return "".join(f"{';'.join(stack)} {count}\n"
+                       for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]))
+
+
+class _Sampler:
+    """Background thread sampling every active profile, alive only while there is one."""
+
+    def __init__(self):
+        self._profiles: List[RequestProfile] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: RequestProfile, max_concurrent: int, interval: float) -> bool:
+        """Start sampling a profile; returns False at the concurrency limit."""
+        with self._lock:
+            if len(self._profiles) >= max_concurrent:
+                return False
+            self._profiles.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, args=(interval,), name="request-profiler", daemon=True
+                )
+                self._thread.start()
+        return True
+
+    def remove(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.remove(profile)
+
+    def _run(self, interval: float) -> None:
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                profiles = list(self._profiles)
+            frames = sys._current_frames()  # pylint: disable=protected-access
+            for profile in profiles:
+                profile.sample(frames)
+            del frames
+            time.sleep(interval)
+
+
+_sampler = _Sampler()
+
+
+def save_profile(profile: RequestProfile, directory: Path, keep: int) -> Path:
+    """
+    Write a profile as <profile id>.collapsed and delete the oldest profiles beyond keep.
+
+    Args:
+        profile: Finished profile
+        directory: Profile directory, created if missing
+        keep: Profiles to keep
+
+    Returns:
+        Path of the written file
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{profile.profile_id}.collapsed"
+    path.write_text(profile.collapsed())
+    stored = sorted(directory.glob("*.collapsed"), key=lambda item: item.stat().st_mtime)
+    for old in stored[:-keep] if keep > 0 else stored:
+        old.unlink(missing_ok=True)
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware running sampled or admin-requested requests under the profiler.
+
+    Attributes:
+        sample_rate (float): Fraction of requests profiled.
+        admin_token (Optional[str]): X-Profile header value that profiles a request.
+        directory (Path): Where profiles are written.
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: Optional[float] = None,
+        admin_token: Optional[str] = None,
+        directory: Optional[Path] = None
+    ):
+        self.app = app
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.admin_token = admin_token or settings.PROFILE_ADMIN_TOKEN
+        self.directory = directory or PROJECT_ROOT / settings.PROFILE_DIR
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        frame = sys._getframe()  # pylint: disable=protected-access
+        profile = RequestProfile(
+            current_request_id(), threading.get_ident(), frame, asyncio.current_task(),
+            settings.PROFILE_MAX_SAMPLES
+        )
+        if not _sampler.add(profile, settings.PROFILE_MAX_CONCURRENT, settings.PROFILE_INTERVAL_MS / 1000):
+            _profiles_skipped.inc()
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile", profile.profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            _sampler.remove(profile)
+            route = route_label(scope)
+            _profiles_recorded.inc(route=route)
+            path = await asyncio.to_thread(save_profile, profile, self.directory, settings.PROFILE_KEEP)
+            logger.info("Profiled %s %s (request %s): %d samples written to %s",
+                        scope["method"], route, profile.request_id, profile.samples, path)
+
+    def _wanted(self, scope) -> bool:
+        if self.admin_token:
+            for name, value in scope["headers"]:
+                # A wrong token falls through to sampling, so it cannot be used to opt out
+                if name == b"x-profile" and hmac.compare_digest(value, self.admin_token.encode("latin-1")):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
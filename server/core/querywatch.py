@@ -0,0 +1,262 @@
+"""
+Slow-query and N+1 detection.
+
+The cursor hooks in server.core.database report every statement here. While a
+QueryLog is open, statements are grouped by shape: literals and bind
+parameters become "?" and IN lists collapse, so the same query for different
+ids counts as one shape. Lazy relationship loads are counted per relationship
+from the ORM's do_orm_execute event.
+
+Two ways to open a log:
+
+- QueryDetectorMiddleware, added when QUERY_DETECTOR_ENABLED is set, opens one
+  per request and logs a warning when a shape repeats QUERY_REPEAT_THRESHOLD
+  times or more (the signature of an N+1 loop), when a relationship is
+  lazy-loaded that often, when a statement takes longer than QUERY_SLOW_MS, or
+  when the route exceeds its entry in QUERY_BUDGETS.
+- query_budget() opens one around any block, e.g. a test client call, and
+  raises QueryBudgetExceeded (an AssertionError) when the block issues more
+  queries than allowed:
+
+      with query_budget(3, "goal list"):
+          client.get("/planner/goals", headers=auth)
+"""
+
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .instrumentation import route_label
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_slow = registry.counter("db_slow_queries_total", "Statements slower than QUERY_SLOW_MS, by route")
+_repeated = registry.counter(
+    "db_repeated_queries_total", "Requests repeating one statement shape past the N+1 threshold, by route"
+)
+_over_budget = registry.counter("db_query_budget_exceeded_total", "Requests over their query budget, by route")
+
+_request_log: ContextVar[Optional["QueryLog"]] = ContextVar("query_log", default=None)
+# Logs opened by query_budget(); process-wide, because a test client runs the
+# app on another thread whose context does not inherit the caller's
+_budget_logs: List["QueryLog"] = []
+_budget_lock = threading.Lock()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"(?:%\(\w+\)s|:\w+|\$\d+|%s|\?)")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Reduce a SQL statement to its shape, so executions differing only in values match.
+
+    Args:
+        statement: SQL as sent to the driver
+
+    Returns:
+        The statement with literals and parameters replaced by "?", IN lists
+        collapsed and whitespace normalized
+    """
+    shape = _STRING.sub("?", statement)
+    shape = _PARAMETER.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("IN (?)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class QueryLog:
+    """
+    Statements issued while the log is open.
+
+    Attributes:
+        count (int): Statements executed.
+        seconds (float): Total execution time.
+        shapes (dict): Per statement shape, [executions, total seconds].
+        lazy_loads (dict): Lazy loads per relationship, e.g. {"Goal.tasks": 20}.
+        slow (list): (statement shape, seconds) for statements over the slow threshold.
+    """
+
+    def __init__(self, slow_seconds: float):
+        self.slow_seconds = slow_seconds
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, List[float]] = {}
+        self.lazy_loads: Dict[str, int] = {}
+        self.slow: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def add(self, shape: str, seconds: float) -> None:
+        """Record one executed statement."""
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            entry = self.shapes.setdefault(shape, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds >= self.slow_seconds:
+                self.slow.append((shape, seconds))
+
+    def add_lazy_load(self, relationship: str) -> None:
+        """Record one lazy load of a relationship."""
+        with self._lock:
+            self.lazy_loads[relationship] = self.lazy_loads.get(relationship, 0) + 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int, float]]:
+        """
+        List the statement shapes executed at least threshold times.
+
+        Args:
+            threshold: Executions that make a shape suspicious
+
+        Returns:
+            (shape, executions, total seconds), most executed first
+        """
+        found = [(shape, int(count), seconds) for shape, (count, seconds) in self.shapes.items()
+                 if count >= threshold]
+        return sorted(found, key=lambda item: -item[1])
+
+    def summary(self, limit: int = 5) -> str:
+        """Describe the most executed shapes, for error messages."""
+        top = sorted(self.shapes.items(), key=lambda item: -item[1][0])[:limit]
+        return "; ".join(f"{int(count)}x {shape[:120]}" for shape, (count, _) in top)
+
+
+def _active_logs() -> List[QueryLog]:
+    log = _request_log.get()
+    if not _budget_logs:
+        return [log] if log is not None else []
+    with _budget_lock:
+        logs = list(_budget_logs)
+    return logs + [log] if log is not None else logs
+
+
+def observe_query(statement: str, seconds: float) -> None:
+    """
+    Record an executed statement in every open log; called by the engine hooks.
+
+    Args:
+        statement: SQL as sent to the driver
+        seconds: Execution time
+    """
+    logs = _active_logs()
+    if logs:
+        shape = statement_shape(statement)
+        for log in logs:
+            log.add(shape, seconds)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+        return
+    logs = _active_logs()
+    if logs:
+        path = orm_execute_state.loader_strategy_path
+        relationship = str(path[-1]) if path else "unknown"
+        for log in logs:
+            log.add_lazy_load(relationship)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget() when a block issues more queries than allowed."""
+
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "block") -> Iterator[QueryLog]:
+    """
+    Fail if the enclosed block executes more than max_queries statements.
+
+    Counts every statement on the application's engines while the block runs,
+    from any thread, so keep other database work out of it.
+
+    Args:
+        max_queries: Statements allowed
+        label: Names the block in the failure message
+
+    Yields:
+        The QueryLog, for further assertions
+
+    Raises:
+        QueryBudgetExceeded: If the budget was exceeded
+    """
+    log = QueryLog(settings.QUERY_SLOW_MS / 1000)
+    with _budget_lock:
+        _budget_logs.append(log)
+    try:
+        yield log
+    finally:
+        with _budget_lock:
+            _budget_logs.remove(log)
+    if log.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{label} executed {log.count} queries, budget is {max_queries}: {log.summary()}"
+        )
+
+
+class QueryDetectorMiddleware:
+    """
+    ASGI middleware that opens a QueryLog per request and reports N+1 patterns,
+    slow statements and exceeded query budgets after the response.
+
+    Attributes:
+        repeat_threshold (int): Executions of one shape that flag an N+1 pattern.
+        slow_seconds (float): Statement time that flags a slow query.
+        budgets (dict): Maximum queries by "METHOD /route/template".
+    """
+
+    def __init__(
+        self,
+        app,
+        repeat_threshold: Optional[int] = None,
+        slow_ms: Optional[float] = None,
+        budgets: Optional[Dict[str, int]] = None
+    ):
+        self.app = app
+        self.repeat_threshold = repeat_threshold or settings.QUERY_REPEAT_THRESHOLD
+        self.slow_seconds = (slow_ms if slow_ms is not None else settings.QUERY_SLOW_MS) / 1000
+        self.budgets = settings.QUERY_BUDGETS if budgets is None else budgets
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog(self.slow_seconds)
+        token = _request_log.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_log.reset(token)
+            if log.count:
+                self._report(f"{scope['method']} {route_label(scope)}", route_label(scope), log)
+
+    def _report(self, endpoint: str, route: str, log: QueryLog) -> None:
+        for shape, count, seconds in log.repeated(self.repeat_threshold):
+            _repeated.inc(route=route)
+            logger.warning(
+                "Possible N+1 in %s: %d executions (%.1f ms) of %.300s", endpoint, count, seconds * 1000, shape
+            )
+        for relationship, count in log.lazy_loads.items():
+            if count >= self.repeat_threshold:
+                logger.warning(
+                    "Possible N+1 in %s: %s lazy-loaded %d times; load it with selectinload()",
+                    endpoint, relationship, count
+                )
+        for shape, seconds in log.slow:
+            _slow.inc(route=route)
+            logger.warning("Slow query in %s (%.1f ms): %.300s", endpoint, seconds * 1000, shape)
+        budget = self.budgets.get(endpoint)
+        if budget is not None and log.count > budget:
+            _over_budget.inc(route=route)
+            logger.error("%s executed %d queries, budget is %d: %s", endpoint, log.count, budget, log.summary())
@@ -0,0 +1,260 @@
+"""
+Server-side token-bucket rate limiting.
+
+RateLimitMiddleware matches each request against per-route policies and takes
+a token from the bucket of the caller: the authenticated user when a valid
+bearer token is present (verified through the token cache, without touching
+the database), otherwise the client IP. A request that finds its bucket empty
+is answered with 429 and a Retry-After header before routing, so it never
+reaches the database, bcrypt or the AI backend.
+
+Buckets live in a RateLimitBackend. MemoryBackend keeps them in process, which
+is exact for a single server process; to share limits across processes or
+hosts, subclass RateLimitBackend over a shared store and select it in
+create_backend().
+
+Rates are written "<requests>/<period>", e.g. "10/minute": the bucket holds
+that many tokens and refills at that pace, so bursts up to the full count are
+allowed.
+"""
+
+import logging
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+from jose import JWTError
+
+from .config import settings
+from .metrics import registry
+from .responses import dumps
+from .security import verify_access_token
+
+logger = logging.getLogger(__name__)
+
+_allowed = registry.counter("rate_limit_allowed_total", "Requests admitted by the rate limiter, by policy")
+_rejected = registry.counter("rate_limit_rejected_total", "Requests refused with 429, by policy")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str) -> Tuple[float, float]:
+    """
+    Parse a rate such as "10/minute".
+
+    Args:
+        rate: "<requests>/<period>", period being second, minute, hour or day
+
+    Returns:
+        (capacity, refill rate in tokens per second)
+
+    Raises:
+        ValueError: If the rate is malformed or not positive
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*/\s*(second|minute|hour|day)s?\s*", rate)
+    if match is None:
+        raise ValueError(f"Invalid rate '{rate}', expected e.g. '10/minute'")
+    capacity = float(match.group(1))
+    if capacity <= 0:
+        raise ValueError(f"Invalid rate '{rate}', the request count must be positive")
+    return capacity, capacity / _PERIODS[match.group(2)]
+
+
+class RateLimitPolicy:
+    """
+    Limit applied to a group of routes.
+
+    Routes sharing a policy share its buckets, so e.g. all AI endpoints draw
+    from one allowance per user.
+
+    Attributes:
+        name (str): Policy name, used in bucket keys and metrics.
+        capacity (float): Bucket size, the largest burst allowed.
+        refill_per_second (float): Steady-state requests per second.
+        per_user (bool): Key buckets by authenticated user, falling back to the
+            client IP; when False, always by client IP.
+    """
+
+    def __init__(self, name: str, rate: str, per_user: bool = True):
+        self.name = name
+        self.capacity, self.refill_per_second = parse_rate(rate)
+        self.per_user = per_user
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets; subclass it to share limits between processes."""
+
+    @abstractmethod
+    async def take(self, key: Hashable, capacity: float, refill_per_second: float) -> float:
+        """
+        Take one token from a bucket, creating it full if it does not exist.
+
+        Args:
+            key: Bucket identifier
+            capacity: Bucket size
+            refill_per_second: Tokens added per second, up to capacity
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Buckets held in this process.
+
+    The least recently used bucket is dropped beyond max_keys; it has usually
+    refilled by then, so dropping it loses nothing.
+
+    Attributes:
+        max_keys (int): Buckets kept at most.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: Hashable, capacity: float, refill_per_second: float) -> float:
+        # No await inside: the read-modify-write runs atomically on the event loop
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / refill_per_second
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+def create_backend() -> RateLimitBackend:
+    """Build the backend selected by RATE_LIMIT_BACKEND."""
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        logger.error("Unknown RATE_LIMIT_BACKEND '%s', using memory", settings.RATE_LIMIT_BACKEND)
+    return MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+
+def default_policies() -> Tuple[List[Tuple[str, str, RateLimitPolicy]], Optional[RateLimitPolicy]]:
+    """
+    Build the route policies from settings.
+
+    Returns:
+        ([(method, path, policy)], default policy for other API requests)
+    """
+    ai = RateLimitPolicy("ai", settings.RATE_LIMIT_AI)
+    routes = [
+        ("POST", "/auth/login", RateLimitPolicy("login", settings.RATE_LIMIT_LOGIN, per_user=False)),
+        ("POST", "/auth/register", RateLimitPolicy("register", settings.RATE_LIMIT_REGISTER, per_user=False)),
+        ("POST", "/planner/ask_ai", ai),
+        ("POST", "/planner/ask_ai/stream", ai),
+        ("POST", "/planner/ask_ai/jobs", ai),
+    ]
+    return routes, RateLimitPolicy("default", settings.RATE_LIMIT_DEFAULT)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing rate limit policies before routing.
+
+    Requests under the skipped prefixes (static files) and to the operational
+    endpoints polled by load balancers and metrics scrapers, often many times a
+    minute from one address, are never limited.
+
+    Behind proxies, the client IP is read from forwarded_header, which each
+    proxy appends the address it received the request from to. Entries to the
+    left of those added by the trusted_hops proxies are written by the client
+    and ignored, so a client cannot pick its own bucket.
+
+    Attributes:
+        backend (RateLimitBackend): Bucket storage.
+        default_policy (Optional[RateLimitPolicy]): Policy for requests no route policy matches.
+        trusted_hops (int): Trusted proxies in front of the app that append to forwarded_header.
+    """
+
+    SKIP_PREFIXES = ("/src/", "/static/", "/assets/")
+    SKIP_PATHS = frozenset({"/api/health-check", "/metrics", "/api/metrics"})
+
+    def __init__(
+        self,
+        app,
+        backend: Optional[RateLimitBackend] = None,
+        routes: Optional[List[Tuple[str, str, RateLimitPolicy]]] = None,
+        default_policy: Optional[RateLimitPolicy] = None,
+        forwarded_header: Optional[str] = None,
+        trusted_hops: int = 1
+    ):
+        self.app = app
+        self.backend = backend or create_backend()
+        if routes is None:
+            routes, default_policy = default_policies()
+        self._routes = {(method, path): policy for method, path, policy in routes}
+        self.default_policy = default_policy
+        self._forwarded_header = forwarded_header.lower().encode("latin-1") if forwarded_header else None
+        self.trusted_hops = max(1, trusted_hops)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.SKIP_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"].rstrip("/") or "/"
+        if path in self.SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+        policy = self._routes.get((scope["method"], path), self.default_policy)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        identity = (self._user(scope) if policy.per_user else None) or self._client_ip(scope)
+        wait = await self.backend.take(f"{policy.name}:{identity}", policy.capacity, policy.refill_per_second)
+        if wait <= 0:
+            _allowed.inc(policy=policy.name)
+            await self.app(scope, receive, send)
+            return
+
+        _rejected.inc(policy=policy.name)
+        retry_after = max(1, math.ceil(wait))
+        body = dumps({"detail": f"Too many requests, please retry in {retry_after} seconds."})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def _client_ip(self, scope) -> str:
+        if self._forwarded_header is not None:
+            # Repeated headers are one list, in order
+            entries = [entry.strip() for name, value in scope["headers"] if name == self._forwarded_header
+                       for entry in value.decode("latin-1").split(",")]
+            entries = [entry for entry in entries if entry]
+            if entries:
+                return "ip:" + entries[max(0, len(entries) - self.trusted_hops)]
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    @staticmethod
+    def _user(scope) -> Optional[str]:
+        """Identify the caller from a valid bearer token; verified payloads come from the token cache."""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return None
+                try:
+                    subject = verify_access_token(token).get("sub")
+                except JWTError:
+                    return None
+                return f"user:{subject}" if subject else None
+        return None
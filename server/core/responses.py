@@ -0,0 +1,54 @@
+"""
+Pre-encoded JSON responses for hot endpoints.
+
+FastAPI normally validates a handler's return value against its response_model,
+converts it with jsonable_encoder and then encodes it with the standard json
+module. Endpoints that build their payload from plain dicts and lists, already
+in the documented shape, can return a FastJSONResponse instead: the body is
+encoded once, with orjson when it is installed, and FastAPI skips the
+validation pass for Response objects. Keep response_model on such routes so the
+OpenAPI schema stays accurate.
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode plain data as compact JSON.
+
+    UUIDs and datetimes are written as strings, the same as FastAPI's own encoder.
+
+    Args:
+        content: Dicts, lists and scalars to encode
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _default(value: Any) -> str:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class FastJSONResponse(Response):
+    """JSON response whose content is encoded by dumps(), without validation."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
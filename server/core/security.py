@@ -1,56 +1,66 @@
 """
 Core security module providing authentication and authorization functionality.
 
-This module handles password hashing, JWT token creation/verification,
-and user authentication for the application.
+This module handles JWT token creation/verification and user authentication for
+the application, and re-exports the password hashing helpers from core.hashing.
 """
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import UUID
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from server.core.database import get_db
+from server.core.database import get_async_db
 from server.apps.authentication.models import User
+from .cache import TTLCache
 from .config import settings
+from .instrumentation import user_id_var
+from .hashing import (  # noqa: F401  (re-exported)
+    hash_password,
+    hash_password_async,
+    needs_rehash,
+    pwd_context,
+    verify_password,
+    verify_password_async,
+)
 
 
 # Security settings
 SECRET_KEY = settings.SECRET_KEY  # Change this to a secure random key
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Authenticated users, keyed by token subject (email)
+user_cache = TTLCache("user", settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+# Verified token payloads, keyed by a SHA-256 digest of the token
+token_cache = TTLCache("token", settings.TOKEN_CACHE_MAX_SIZE, settings.TOKEN_CACHE_TTL_SECONDS)
 
 
-def hash_password(password: str) -> str:
+class UserPrincipal(BaseModel):
     """
-    Hash a password using bcrypt.
-    
-    Args:
-        password: Plain text password to hash
-        
-    Returns:
-        Securely hashed password
-    """
-    return pwd_context.hash(password)
+    Lightweight, read-only view of an authenticated user.
 
+    Returned by get_current_user instead of the ORM User so it can be cached
+    across requests without being bound to a database session.
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+    Attributes:
+        id (UUID): The user's unique identifier.
+        email (str): The user's email address.
+        first_name (str): The user's first name.
+        last_name (str): The user's last name.
     """
-    Verify a password against its hash.
-    
-    Args:
-        plain_password: Plain text password to check
-        hashed_password: Hashed password to compare against
-        
-    Returns:
-        True if password matches, False otherwise
-    """
-    return pwd_context.verify(plain_password, hashed_password)
+    id: UUID
+    email: str
+    first_name: str
+    last_name: str
+
+    model_config = {"frozen": True}
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -74,6 +84,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def verify_access_token(token: str) -> dict:
+    """
+    Verify a JWT access token and return its payload.
+
+    Verified payloads are cached until the token's exp claim (or the cache TTL,
+    whichever comes first), so repeat requests from the same session skip the
+    signature check and claims parsing.
+
+    Args:
+        token: JWT token string to verify
+
+    Returns:
+        Dictionary containing the token payload
+
+    Raises:
+        JWTError: If the token is invalid or expired
+    """
+    cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        return dict(payload)
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    expires_at = payload.get("exp")
+    ttl_seconds = expires_at - time.time() if isinstance(expires_at, (int, float)) else None
+    token_cache.set(cache_key, dict(payload), ttl_seconds)
+    return payload
+
+
 def decode_access_token(token: str) -> dict:
     """
     Decode and validate a JWT access token.
@@ -85,8 +124,7 @@ def decode_access_token(token: str) -> dict:
         Dictionary containing the token payload or empty dict if invalid
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        return verify_access_token(token)
     except JWTError:
         return {}
 
@@ -94,29 +132,63 @@ def decode_access_token(token: str) -> dict:
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def invalidate_user(email: str) -> None:
+    """
+    Drop a user from the authenticated-user cache.
+
+    Must be called whenever a user is deleted or their profile changes, so the
+    next request reloads them from the database.
+
+    Args:
+        email: Email address (token subject) of the user
+    """
+    user_cache.invalidate(email)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
     """
     Get the current authenticated user from a JWT token.
+
+    The user is served from an in-process cache when possible, so most requests
+    skip the database lookup entirely.
     
     Args:
         token: JWT token extracted from Authorization header
-        db: Database session
+        db: Async database session
         
     Returns:
-        User object if authentication is successful
+        UserPrincipal for the authenticated user
         
     Raises:
         HTTPException: If token is invalid or user not found
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = verify_access_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     except JWTError as exc:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials") from exc
 
-    user = db.query(User).filter(User.email == email).first()
+    principal = user_cache.get(email)
+    if principal is not None:
+        user_id_var.set(str(principal.id))
+        return principal
+
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+
+    principal = UserPrincipal(
+        id=user.id,
+        email=user.email,
+        first_name=user.first_name,
+        last_name=user.last_name
+    )
+    user_cache.set(email, principal)
+    user_id_var.set(str(principal.id))
+    return principal
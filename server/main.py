@@ -5,47 +5,76 @@ Main module for the FastAPI application.
 # Standard library imports
 import atexit
 import logging
-from pathlib import Path
+from contextlib import asynccontextmanager
 
 # Third-party imports
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy import inspect
 
 from server.apps.authentication.routes import router as auth_router
-from server.apps.planner.routes import router as planner_router
-from server.core.database import create_db_and_tables, drop_db_and_tables, engine
-
-
-def lifespan(app_instance: FastAPI):
-    print("Checking if the database exists...")
-    print(app_instance)
+from server.apps.planner.plan_cache import ensure_plan_cache_columns
+from server.apps.planner.progress import ensure_counter_columns
+from server.apps.planner.routes import plan_jobs, router as planner_router
+from server.core.assets import enable_fingerprinting, router as assets_router
+from server.core.config import settings
+from server.core.database import (async_engine, create_db_and_tables, create_missing_indexes,
+                                  drop_db_and_tables, engine)
+from server.core.hashing import configure_hashing, hashing_pool
+from server.core.instrumentation import RequestMetricsMiddleware
+from server.core.logging_config import configure_logging
+from server.core.metrics import registry
+from server.core.pages import page_cache
+from server.core.profiling import ProfilingMiddleware
+from server.core.querywatch import QueryDetectorMiddleware
+from server.core.ratelimit import RateLimitMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app_instance: FastAPI):
+    logger.info("Checking if the database exists...")
     try:
         # Use SQLAlchemy's inspector to check for existing tables
         with engine.connect() as connection:
             inspector = inspect(connection)
             tables = inspector.get_table_names()  # Get a list of all tables in the database
             if tables:
-                print("Database exists and has tables.")
+                logger.info("Database exists and has tables.")
+                # Add tables introduced since the database was created; existing ones are untouched
+                create_db_and_tables()
+                ensure_plan_cache_columns(engine)
+                backfilled = ensure_counter_columns(engine)
+                if backfilled:
+                    logger.info("Backfilled progress counters of %d goals.", backfilled)
+                for index in create_missing_indexes(engine):
+                    logger.info("Created missing index %s.", index)
             else:
-                print("Database exists but has no tables. Dropping and recreating...")
+                logger.info("Database exists but has no tables. Dropping and recreating...")
                 drop_db_and_tables()  # Drop all tables
                 create_db_and_tables()  # Recreate the database and tables
-                print("Database recreated successfully.")
+                logger.info("Database recreated successfully.")
     except (ConnectionError, RuntimeError) as error:  # Catch specific exceptions if possible
-        print(f"Error accessing the database: {error}")
-        print("Dropping and recreating the database...")
+        logger.error("Error accessing the database: %s", error)
+        logger.info("Dropping and recreating the database...")
         drop_db_and_tables()  # Drop all tables
         create_db_and_tables()  # Recreate the database and tables
-        print("Database recreated successfully.")
+        logger.info("Database recreated successfully.")
+
+    logger.info("Using bcrypt cost factor %d", configure_hashing())
+    enable_fingerprinting()
+    await plan_jobs.start()
 
     yield  # This marks the end of the startup phase and the beginning of the shutdown phase
-    # Shutdown logic (if needed)
+    # Shutdown logic
+    await plan_jobs.stop()
+    hashing_pool.shutdown()
+    await async_engine.dispose()
 
 
-logging.basicConfig()
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(lifespan=lifespan)#, docs_url=None, redoc_url=None)
 
@@ -57,28 +86,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.PROFILE_SAMPLE_RATE > 0 or settings.PROFILE_ADMIN_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.QUERY_DETECTOR_ENABLED:
+    app.add_middleware(QueryDetectorMiddleware)
+
+if settings.RATE_LIMIT_ENABLED:
+    # Added last so it runs first: refused requests cost no routing, database or bcrypt work
+    app.add_middleware(RateLimitMiddleware, forwarded_header=settings.RATE_LIMIT_FORWARDED_HEADER,
+                       trusted_hops=settings.RATE_LIMIT_TRUSTED_HOPS)
+
+# Outermost, so latency covers everything above and rate-limited requests are counted too
+app.add_middleware(RequestMetricsMiddleware)
+
 # Mount the static files directory
 app.mount("/src", StaticFiles(directory="src"), name="static")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Fingerprinted copies of the files under /src, cached by browsers for good
+app.include_router(assets_router, prefix="/assets")
+
 app.include_router(auth_router, prefix="/auth", tags=["authentication"])
 app.include_router(planner_router, prefix="/planner", tags=["planner"])
 
 
 @app.get("/", response_class=HTMLResponse)
-def home_page():
+def home_page(request: Request):
     """
-    Serves the home page HTML content.
+    Serves the home page HTML content from the page cache.
     """
-    # Path to the registration HTML file
-    html_file_path = Path(__file__).parent.parent / "src/pages/home-page.html"
-
-    # Read the HTML file content
-    if html_file_path.exists():
-        html_content = html_file_path.read_text(encoding="utf-8")
-        return HTMLResponse(content=html_content)
+    response = page_cache.serve(request, "home-page.html")
+    if response is not None:
+        return response
     return HTMLResponse(content="<h1>Home page not found</h1>", status_code=404)
 
 @app.get("/api/health-check")
 def health_check():
     return {"status": "ok", "message": "Server is running"}
+
+@app.get("/api/metrics")
+def metrics_snapshot():
+    """
+    Returns the current value of every in-process metric (cache hit/miss/eviction
+    counters and so on) as JSON.
+    """
+    return registry.snapshot()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_prometheus():
+    """
+    Returns every in-process metric (request latency per route, database, bcrypt,
+    AI, cache and queue metrics) in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
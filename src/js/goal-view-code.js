@@ -4,7 +4,8 @@ import {
     getUserData, 
     redirectToLogin, 
     setupServerReconnection,
-    fetchWithAuth 
+    fetchWithAuth,
+    fetchAllPages
 } from '/src/js/utils/auth-utils.js';
 
 import { createToast } from '/src/js/utils/toast-utils.js';
@@ -103,13 +104,7 @@ async function loadGoalDetails() {
 // Load goal tasks
 async function loadGoalTasks() {
     try {
-        const response = await fetchWithAuth(`/planner/goal/${goalId}/tasks`);
-        
-        if (!response.ok) {
-            throw new Error(`Failed to fetch tasks: ${response.status}`);
-        }
-        
-        goalTasks = await response.json();
+        goalTasks = await fetchAllPages(`/planner/goal/${goalId}/tasks`);
         renderTasksSection();
         renderProgressSection(); // Render progress after loading tasks
         
@@ -271,20 +266,56 @@ function closeAddTaskModal() {
 }
 
 // Task management functions
-async function toggleTask(taskId, completed) {
+
+// Toggles made in quick succession are sent together as one batch request
+const TOGGLE_BATCH_DELAY_MS = 150;
+let pendingToggles = new Map();
+let toggleFlushTimer = null;
+
+function toggleTask(taskId, completed) {
+    pendingToggles.set(taskId, completed);
+    clearTimeout(toggleFlushTimer);
+    toggleFlushTimer = setTimeout(flushToggles, TOGGLE_BATCH_DELAY_MS);
+}
+
+async function flushToggles() {
+    const toggles = pendingToggles;
+    pendingToggles = new Map();
+    if (toggles.size === 0) return;
+
+    const operations = [...toggles].map(([id, completed]) => ({ op: 'toggle', id, completed }));
+    let results = [];
     try {
-        const response = await fetchWithAuth(`/planner/task/${taskId}/toggle`, {
+        const response = await fetchWithAuth(`/planner/goal/${goalId}/tasks/batch`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ completed })
+            body: JSON.stringify({ operations })
         });
         
         if (!response.ok) {
             throw new Error('Failed to update task');
         }
         
-        const updatedTask = await response.json();
-        
+        results = (await response.json()).results;
+    } catch (error) {
+        console.error('Failed to toggle tasks:', error);
+    }
+
+    let updated = 0;
+    operations.forEach((operation, index) => {
+        const result = results[index];
+        const taskId = operation.id;
+
+        if (!result || result.status !== 200) {
+            // Revert checkbox state
+            const checkbox = document.getElementById(`task-${taskId}`);
+            if (checkbox) checkbox.checked = !operation.completed;
+            return;
+        }
+
+        updated++;
+        const updatedTask = result.task;
+
         // Update local data
         const taskIndex = goalTasks.findIndex(task => task.id === taskId);
         if (taskIndex !== -1) {
@@ -294,25 +325,23 @@ async function toggleTask(taskId, completed) {
         // Update UI
         const taskCard = document.querySelector(`[data-task-id="${taskId}"]`);
         if (taskCard) {
-            if (completed) {
+            if (updatedTask.completed) {
                 taskCard.classList.add('completed');
             } else {
                 taskCard.classList.remove('completed');
             }
         }
-        
-        // Update progress
-        renderProgressSection();
-        
-        createToast(completed ? 'Task completed!' : 'Task marked as incomplete', 'success');
-        
-    } catch (error) {
-        console.error('Failed to toggle task:', error);
+    });
+
+    // Update progress
+    renderProgressSection();
+
+    if (updated < operations.length) {
         createToast('Failed to update task', 'error');
-        
-        // Revert checkbox state
-        const checkbox = document.getElementById(`task-${taskId}`);
-        if (checkbox) checkbox.checked = !completed;
+    } else if (operations.length === 1) {
+        createToast(operations[0].completed ? 'Task completed!' : 'Task marked as incomplete', 'success');
+    } else {
+        createToast(`${updated} tasks updated`, 'success');
     }
 }
 
@@ -4,7 +4,8 @@ import {
     getUserData, 
     redirectToLogin, 
     setupServerReconnection,
-    fetchWithAuth 
+    fetchWithAuth,
+    fetchAllPages
 } from '/src/js/utils/auth-utils.js';
 
 import { createToast } from '/src/js/utils/toast-utils.js';
@@ -57,13 +58,7 @@ async function loadUserData() {
 // Load goals from backend
 async function loadGoals() {
     try {
-        const response = await fetchWithAuth('/planner/goals');
-
-        if (!response.ok) {
-            throw new Error(`Failed to fetch goals: ${response.status}`);
-        }
-        
-        userGoals = await response.json();
+        userGoals = await fetchAllPages('/planner/goals');
         renderGoals();
         
     } catch (error) {
@@ -157,9 +152,9 @@ function renderGoals() {
                 <p class="goal-card-description">${escapeHtml(goal.description || 'No description')}</p>
                 <div class="goal-card-progress">
                     <div class="progress-bar">
-                        <div class="progress-fill" style="width: ${goal.progress || 0}%"></div>
+                        <div class="progress-fill" style="width: ${Math.round(goal.completion_percentage || 0)}%"></div>
                     </div>
-                    <span class="progress-text">${goal.progress || 0}%</span>
+                    <span class="progress-text">${Math.round(goal.completion_percentage || 0)}%</span>
                 </div>
                 <div class="goal-card-meta">
                     <span class="goal-card-due">Due: ${formatDate(goal.due_date)}</span>
@@ -186,7 +181,7 @@ function updateDashboardStats() {
     // Calculate overall progress
     let overallProgress = 0;
     if (totalGoals > 0) {
-        const totalProgress = userGoals.reduce((sum, goal) => sum + (goal.progress || 0), 0);
+        const totalProgress = userGoals.reduce((sum, goal) => sum + (goal.completion_percentage || 0), 0);
         overallProgress = Math.round(totalProgress / totalGoals);
     }
     
@@ -39,6 +39,30 @@ export function fetchWithAuth(url, options = {}) {
     });
 }
 
+// Fetch every page of a cursor-paginated listing and return the combined items
+export async function fetchAllPages(url, options = {}) {
+  const items = [];
+  let cursor = null;
+
+  do {
+    const separator = url.includes('?') ? '&' : '?';
+    const pageUrl = cursor ? `${url}${separator}cursor=${encodeURIComponent(cursor)}` : url;
+    const response = await fetchWithAuth(pageUrl, options);
+
+    if (!response.ok) {
+      const error = new Error(`Request failed: ${response.status}`);
+      error.status = response.status;
+      throw error;
+    }
+
+    const page = await response.json();
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor);
+
+  return items;
+}
+
 async function refreshToken() {
   try {
     const refreshToken = localStorage.getItem("refresh_token");
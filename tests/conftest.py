@@ -0,0 +1,80 @@
+"""
+Shared fixtures: the app runs against a throwaway SQLite database, with the
+stub AI backend, cheap bcrypt and rate limiting off.
+"""
+
+import os
+import tempfile
+import uuid
+
+_db_dir = tempfile.mkdtemp(prefix="tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["AI_BACKEND"] = "stub"
+os.environ["AI_STUB_LATENCY_MS"] = "0"
+os.environ["ASSETS_BUILD_DIR"] = f"{_db_dir}/assets"
+os.environ["LOG_LEVEL"] = "WARNING"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from server.main import app  # noqa: E402
+from server.apps.authentication.models import User  # noqa: E402
+from server.apps.planner.models import Goal, Task  # noqa: E402
+from server.core.database import SessionLocal  # noqa: E402
+from server.core.security import create_access_token  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Test client with the app's lifespan (database setup, workers) running."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_user(client):
+    """Factory creating a fresh user; it returns their id and the headers authenticating as them."""
+
+    def create():
+        email = f"user-{uuid.uuid4().hex}@example.com"
+        with SessionLocal() as db:
+            account = User(first_name="Test", last_name="User", email=email, hashed_password="unused")
+            db.add(account)
+            db.commit()
+            user_id = account.id
+        return {"id": user_id, "headers": {"Authorization": f"Bearer {create_access_token({'sub': email})}"}}
+
+    return create
+
+
+@pytest.fixture
+def user(make_user):
+    """A fresh user."""
+    return make_user()
+
+
+@pytest.fixture
+def make_goal():
+    """
+    Factory creating a goal with tasks, counters included.
+
+    Call it with the owner's id and one completed flag per task; it returns
+    the goal id and the task ids, in order.
+    """
+
+    def create(user_id, completed=()):
+        with SessionLocal() as db:
+            goal = Goal(title="Goal", description="", user_id=user_id, total_tasks=len(completed),
+                        completed_tasks=sum(completed), completed=bool(completed) and all(completed))
+            db.add(goal)
+            db.flush()
+            tasks = [Task(title=f"Task {index}", completed=done, goal_id=goal.id)
+                     for index, done in enumerate(completed)]
+            db.add_all(tasks)
+            db.commit()
+            return goal.id, [task.id for task in tasks]
+
+    return create
@@ -0,0 +1,88 @@
+"""AIGateway bounds a whole call by its deadline and trips the breaker only on transient errors."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from server.apps.planner.ai_gateway import AIGateway, CircuitBreaker
+
+
+class _Backend:
+    """Backend whose calls sleep for a while, then fail with the given error or answer."""
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def generate(self, goal_title):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return goal_title
+
+    async def stream(self, goal_title):
+        yield await self.generate(goal_title)
+
+
+def _gateway(backend, **options) -> AIGateway:
+    config = {"max_concurrency": 4, "timeout_seconds": 1.0, "deadline_seconds": 5.0, "max_retries": 0,
+              "retry_base_seconds": 0.0, "retry_max_seconds": 0.0,
+              "breaker": CircuitBreaker(failure_threshold=1, reset_seconds=30)}
+    config.update(options)
+    return AIGateway(backend, **config)
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.parametrize("operation", ["generate", "stream"])
+def test_retries_stop_at_the_call_deadline(operation):
+    gateway = _gateway(_Backend(delay=10), timeout_seconds=0.1, deadline_seconds=0.25, max_retries=50)
+    call = (gateway.generate_plan("goal") if operation == "generate"
+            else _collect(gateway.stream_plan("goal")))
+
+    start = time.monotonic()
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(call)
+
+    assert raised.value.status_code == 504
+    assert time.monotonic() - start < 0.5
+
+
+def test_waiting_for_a_slot_counts_against_the_deadline():
+    gateway = _gateway(_Backend(delay=0.5), max_concurrency=1, deadline_seconds=0.2)
+
+    async def both():
+        return await asyncio.gather(gateway.generate_plan("first"), gateway.generate_plan("second"),
+                                    return_exceptions=True)
+
+    first, second = asyncio.run(both())
+
+    assert isinstance(first, HTTPException) and first.status_code == 504
+    assert isinstance(second, HTTPException) and second.status_code == 504
+    assert gateway.breaker.failures == 1  # only the call that reached the backend
+
+
+def test_rejected_requests_do_not_open_the_circuit():
+    gateway = _gateway(_Backend(error=ValueError("bad request")))
+
+    for _ in range(3):
+        with pytest.raises(HTTPException) as raised:
+            asyncio.run(gateway.generate_plan("goal"))
+        assert raised.value.status_code == 503
+
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_transient_errors_open_the_circuit():
+    gateway = _gateway(_Backend(error=ConnectionError("reset")))
+
+    with pytest.raises(HTTPException):
+        asyncio.run(gateway.generate_plan("goal"))
+
+    assert gateway.breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,43 @@
+"""CircuitBreaker's half-open trial slot belongs to the call that acquired it."""
+
+from server.apps.planner.ai_gateway import CircuitBreaker
+
+
+def _half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    breaker.opened_at -= 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+def test_only_one_trial_call_in_half_open():
+    breaker = _half_open_breaker()
+
+    allowed, trial = breaker.acquire()
+    assert allowed and trial is not None
+    assert breaker.acquire() == (False, None)
+
+
+def test_calls_without_the_trial_token_cannot_free_the_slot():
+    breaker = _half_open_breaker()
+    _, trial = breaker.acquire()
+
+    breaker.release_trial(None)  # an ordinary call admitted before the circuit opened
+    assert breaker.acquire() == (False, None)
+
+    breaker.release_trial(trial)
+    allowed, _ = breaker.acquire()
+    assert allowed
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = _half_open_breaker()
+    _, trial = breaker.acquire()
+
+    breaker.record_failure(trial)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    breaker.opened_at -= 30
+    allowed, _ = breaker.acquire()
+    assert allowed
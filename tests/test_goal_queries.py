@@ -0,0 +1,24 @@
+"""The goal listing must not issue a query per goal."""
+
+from server.core.querywatch import query_budget
+
+
+def _count_listing_queries(client, headers) -> int:
+    client.get("/planner/goals", headers=headers)  # warm the user cache
+    with query_budget(10, "goal list") as log:
+        response = client.get("/planner/goals", headers=headers)
+    assert response.status_code == 200
+    return log.count
+
+
+def test_goal_listing_query_count_does_not_grow_with_goals(client, user, make_goal):
+    for _ in range(2):
+        make_goal(user["id"], completed=(True, False))
+    with_two = _count_listing_queries(client, user["headers"])
+
+    for _ in range(18):
+        make_goal(user["id"], completed=(True, False))
+    with_twenty = _count_listing_queries(client, user["headers"])
+
+    assert len(client.get("/planner/goals", headers=user["headers"]).json()["items"]) == 20
+    assert with_twenty == with_two
@@ -0,0 +1,31 @@
+"""JobQueue stops serving finished jobs once their results expire."""
+
+import asyncio
+
+from server.core.jobs import JobQueue
+
+
+async def _answer(job):
+    return 42
+
+
+def test_expired_jobs_are_gone_without_new_submissions():
+    queue = JobQueue("test", _answer, workers=1, max_size=10, result_ttl_seconds=0.05)
+
+    async def run():
+        await queue.start()
+        try:
+            job, _ = queue.submit("owner", {})
+            while not job.finished:
+                await job.wait_for_change(timeout=1)
+            assert queue.get(job.id) is job
+            await asyncio.sleep(0.1)
+            return job, queue.get(job.id)
+        finally:
+            await queue.stop()
+
+    job, expired = asyncio.run(run())
+
+    assert job.result == 42
+    assert expired is None
+    assert job.id not in queue._jobs  # pylint: disable=protected-access
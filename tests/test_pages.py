@@ -0,0 +1,26 @@
+"""HTML pages: one strong ETag per encoded body, and Accept-Encoding negotiation."""
+
+from server.core.pages import accepted_encodings
+
+
+def test_each_encoding_has_its_own_etag(client):
+    etags = {}
+    for coding in ("identity", "gzip", "br"):
+        response = client.get("/", headers={"Accept-Encoding": coding})
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding", "identity") == coding
+        etags[coding] = response.headers["etag"]
+
+    assert len(set(etags.values())) == 3
+    revalidated = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": etags["gzip"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etags["gzip"]
+    other = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": etags["identity"]})
+    assert other.status_code == 200
+
+
+def test_wildcard_accepts_every_coding_not_refused():
+    assert accepted_encodings("*") == {"br", "gzip"}
+    assert accepted_encodings("br;q=0, *") == {"gzip"}
+    assert accepted_encodings("gzip, *;q=0") == {"gzip"}
+    assert accepted_encodings("identity") == {"identity"}
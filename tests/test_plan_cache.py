@@ -0,0 +1,44 @@
+"""Plans served from the AI plan cache must not carry another user's wording."""
+
+import uuid
+
+
+def _ask(client, user, goal_title):
+    response = client.post("/planner/ask_ai", headers=user["headers"], json={"goal_title": goal_title})
+    assert response.status_code == 201
+    return response.json()
+
+
+def _text(goal):
+    return " ".join([goal["title"], goal["description"], *(task["title"] for task in goal["tasks"])]).lower()
+
+
+def test_near_match_never_serves_another_users_plan(client, make_user):
+    marker = uuid.uuid4().hex[:6]
+    _ask(client, make_user(), f"Learn Python programming for my job at Acme {marker}")
+
+    goal = _ask(client, make_user(), f"Learn Python programming for my job at Initech {marker}")
+
+    assert "acme" not in _text(goal)
+
+
+def test_near_match_reuses_the_same_users_plan(client, user):
+    marker = uuid.uuid4().hex[:6]
+    first = _ask(client, user, f"Learn Python programming {marker}")
+
+    second_title = f"Learn Python programing {marker}"
+    second = _ask(client, user, second_title)
+
+    assert second["title"] == second_title
+    assert [task["title"] for task in second["tasks"]] == [task["title"] for task in first["tasks"]]
+
+
+def test_exact_match_is_shared_between_users(client, make_user):
+    marker = uuid.uuid4().hex[:6]
+    first = _ask(client, make_user(), f"Learn Python, {marker}!")
+
+    second_title = f"learn python {marker}"
+    second = _ask(client, make_user(), second_title)
+
+    assert second["title"] == second_title
+    assert [task["title"] for task in second["tasks"]] == [task["title"] for task in first["tasks"]]
@@ -0,0 +1,45 @@
+"""ProfilingMiddleware: who gets profiled, and where profiles are written."""
+
+import asyncio
+
+from server.core.instrumentation import request_id_var
+from server.core.profiling import ProfilingMiddleware
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _request(middleware, headers=(), request_id=None):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        request_id_var.set(request_id)
+        scope = {"type": "http", "method": "GET", "path": "/planner/goals", "headers": list(headers)}
+        await middleware(scope, None, send)
+
+    asyncio.run(run())
+    return dict(sent[0]["headers"])
+
+
+def test_wrong_token_does_not_skip_sampling(tmp_path):
+    middleware = ProfilingMiddleware(_ok, sample_rate=1.0, admin_token="secret", directory=tmp_path)
+
+    headers = _request(middleware, [(b"x-profile", b"wrong")])
+
+    assert b"x-profile" in headers
+
+
+def test_profiles_are_named_by_the_server_not_the_client(tmp_path):
+    middleware = ProfilingMiddleware(_ok, sample_rate=0.0, admin_token="secret", directory=tmp_path)
+
+    first = _request(middleware, [(b"x-profile", b"secret")], request_id="client-chosen")
+    second = _request(middleware, [(b"x-profile", b"secret")], request_id="client-chosen")
+
+    names = {path.stem for path in tmp_path.glob("*.collapsed")}
+    assert names == {first[b"x-profile"].decode(), second[b"x-profile"].decode()}
+    assert "client-chosen" not in names
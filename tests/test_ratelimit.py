@@ -0,0 +1,32 @@
+"""RateLimitMiddleware leaves health checks and metrics scrapes alone."""
+
+import asyncio
+
+import pytest
+
+from server.core.ratelimit import MemoryBackend, RateLimitMiddleware, RateLimitPolicy
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _status(middleware, path):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [], "client": ("10.0.0.1", 1234)}
+    asyncio.run(middleware(scope, None, send))
+    return sent[0]["status"]
+
+
+@pytest.mark.parametrize("path", ["/api/health-check", "/metrics", "/api/metrics"])
+def test_operational_endpoints_are_not_limited(path):
+    middleware = RateLimitMiddleware(_ok, MemoryBackend(100), routes=[],
+                                     default_policy=RateLimitPolicy("default", "1/minute"))
+
+    assert [_status(middleware, path) for _ in range(5)] == [200] * 5
+    assert [_status(middleware, "/planner/goals") for _ in range(2)] == [200, 429]
@@ -0,0 +1,59 @@
+"""Startup brings a database created by an older version up to the current schema."""
+
+import uuid
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+
+from server.apps.planner.models import Goal
+from server.apps.planner.progress import ensure_counter_columns
+from server.core.database import create_missing_indexes
+
+KEYSET_INDEXES = {"task": "ix_task_goal_id_id", "goal": "ix_goal_user_id_id"}
+
+
+def test_keyset_indexes_are_added_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for index in KEYSET_INDEXES.values():
+            connection.execute(text(f"DROP INDEX {index}"))
+
+    created = create_missing_indexes(engine)
+
+    assert sorted(created) == sorted(KEYSET_INDEXES.values())
+    inspector = inspect(engine)
+    for table, index in KEYSET_INDEXES.items():
+        assert index in {existing["name"] for existing in inspector.get_indexes(table)}
+    assert create_missing_indexes(engine) == []
+
+
+def test_counters_are_backfilled_once_when_the_columns_are_added(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    SQLModel.metadata.create_all(engine)
+    goal_id = uuid.uuid4()
+    with engine.begin() as connection:
+        for column in ("total_tasks", "completed_tasks", "revision"):
+            connection.execute(text(f"ALTER TABLE goal DROP COLUMN {column}"))
+        connection.execute(
+            text("INSERT INTO goal (id, title, description, completed, user_id) VALUES (:id, 'Goal', '', 0, :user)"),
+            {"id": goal_id.hex, "user": uuid.uuid4().hex}
+        )
+        for _ in range(2):
+            connection.execute(
+                text("INSERT INTO task (id, title, completed, goal_id) VALUES (:id, 'Task', 1, :goal)"),
+                {"id": uuid.uuid4().hex, "goal": goal_id.hex}
+            )
+
+    assert ensure_counter_columns(engine) == 1
+    with Session(engine) as db:
+        goal = db.get(Goal, goal_id)
+        assert (goal.total_tasks, goal.completed_tasks, goal.completed) == (2, 2, True)
+        goal.total_tasks = 5
+        db.commit()
+
+    # Drift after the upgrade is left to the repair command
+    assert ensure_counter_columns(engine) == 0
+    with Session(engine) as db:
+        assert db.get(Goal, goal_id).total_tasks == 5
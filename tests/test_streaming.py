@@ -0,0 +1,27 @@
+"""POST /planner/ask_ai/stream saves the goal like /planner/ask_ai does."""
+
+import json
+
+from server.apps.planner.routes import get_plan_chunk_source
+from server.main import app
+
+
+def test_streamed_goal_keeps_the_requested_title(client, user):
+    model_output = json.dumps({"title": "Something the model made up " * 10, "description": "Plan",
+                               "tasks_to_goal": ["First", "Second"]})
+
+    async def chunks(goal_title):
+        for start in range(0, len(model_output), 16):
+            yield model_output[start:start + 16]
+
+    app.dependency_overrides[get_plan_chunk_source] = lambda: chunks
+    try:
+        response = client.post("/planner/ask_ai/stream", headers=user["headers"],
+                               json={"goal_title": "Run a marathon"})
+    finally:
+        app.dependency_overrides.pop(get_plan_chunk_source)
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["event"] == "goal"
+    assert events[0]["goal"]["title"] == "Run a marathon"
+    assert [event["task"]["title"] for event in events if event["event"] == "task"] == ["First", "Second"]
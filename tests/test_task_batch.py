@@ -0,0 +1,132 @@
+"""POST /planner/goal/{goal_id}/tasks/batch."""
+
+import uuid
+
+from server.apps.planner.models import Goal, Task
+from server.core.database import SessionLocal
+
+
+def _batch(client, user, goal_id, *operations):
+    response = client.post(f"/planner/goal/{goal_id}/tasks/batch", headers=user["headers"],
+                           json={"operations": list(operations)})
+    assert response.status_code == 200
+    return [(result["op"], result["status"]) for result in response.json()["results"]]
+
+
+def _goal_state(goal_id):
+    """Stored counters next to the ones recomputed from the tasks."""
+    with SessionLocal() as db:
+        goal = db.get(Goal, goal_id)
+        tasks = db.query(Task).filter(Task.goal_id == goal_id).all()
+        return ((goal.total_tasks, goal.completed_tasks, goal.completed),
+                (len(tasks), sum(task.completed for task in tasks),
+                 bool(tasks) and all(task.completed for task in tasks)))
+
+
+def test_results_follow_request_order_and_counters_match(client, user, make_goal):
+    goal_id, (first, second) = make_goal(user["id"], completed=(False, True))
+
+    results = _batch(
+        client, user, goal_id,
+        {"op": "create", "title": "New", "completed": True},
+        {"op": "toggle", "id": str(first), "completed": True},
+        {"op": "delete", "id": str(second)},
+    )
+
+    assert results == [("create", 201), ("toggle", 200), ("delete", 204)]
+    stored, actual = _goal_state(goal_id)
+    assert stored == actual == (2, 2, True)
+
+
+def test_operations_on_a_task_deleted_earlier_in_the_batch_are_not_found(client, user, make_goal):
+    goal_id, (task,) = make_goal(user["id"], completed=(True,))
+
+    results = _batch(
+        client, user, goal_id,
+        {"op": "delete", "id": str(task)},
+        {"op": "toggle", "id": str(task), "completed": False},
+        {"op": "delete", "id": str(task)},
+    )
+
+    assert results == [("delete", 204), ("toggle", 404), ("delete", 404)]
+    stored, actual = _goal_state(goal_id)
+    assert stored == actual == (0, 0, False)
+
+
+def test_toggle_then_delete_deletes_the_task(client, user, make_goal):
+    goal_id, (task, other) = make_goal(user["id"], completed=(False, False))
+
+    results = _batch(
+        client, user, goal_id,
+        {"op": "toggle", "id": str(task), "completed": True},
+        {"op": "delete", "id": str(task)},
+    )
+
+    assert results == [("toggle", 200), ("delete", 204)]
+    with SessionLocal() as db:
+        assert db.get(Task, task) is None
+        assert db.get(Task, other) is not None
+    stored, actual = _goal_state(goal_id)
+    assert stored == actual == (1, 0, False)
+
+
+def test_toggles_to_the_current_state_do_not_change_counters(client, user, make_goal):
+    goal_id, (done, open_task) = make_goal(user["id"], completed=(True, False))
+
+    results = _batch(
+        client, user, goal_id,
+        {"op": "toggle", "id": str(done), "completed": True},
+        {"op": "toggle", "id": str(open_task), "completed": False},
+    )
+
+    assert results == [("toggle", 200), ("toggle", 200)]
+    stored, actual = _goal_state(goal_id)
+    assert stored == actual == (2, 1, False)
+
+
+def test_tasks_of_other_goals_and_invalid_operations_are_skipped(client, user, make_goal):
+    goal_id, (task,) = make_goal(user["id"], completed=(False,))
+    _, (foreign,) = make_goal(user["id"], completed=(False,))
+
+    results = _batch(
+        client, user, goal_id,
+        {"op": "toggle", "id": str(foreign), "completed": True},
+        {"op": "delete", "id": str(uuid.uuid4())},
+        {"op": "create", "title": "   "},
+        {"op": "toggle", "id": str(task)},
+    )
+
+    assert results == [("toggle", 404), ("delete", 404), ("create", 400), ("toggle", 400)]
+    stored, actual = _goal_state(goal_id)
+    assert stored == actual == (1, 0, False)
+
+
+def test_another_users_goal_is_not_found(client, user, make_goal):
+    goal_id, _ = make_goal(uuid.uuid4())
+
+    response = client.post(f"/planner/goal/{goal_id}/tasks/batch", headers=user["headers"],
+                           json={"operations": [{"op": "create", "title": "Intruder"}]})
+
+    assert response.status_code == 404
+
+
+def test_changes_that_cancel_out_still_change_the_etags(client, user, make_goal):
+    goal_id, (done, open_task) = make_goal(user["id"], completed=(True, False))
+    tasks_url = f"/planner/goal/{goal_id}/tasks"
+    tasks_etag = client.get(tasks_url, headers=user["headers"]).headers["etag"]
+    goals_etag = client.get("/planner/goals", headers=user["headers"]).headers["etag"]
+
+    results = _batch(
+        client, user, goal_id,
+        {"op": "toggle", "id": str(done), "completed": False},
+        {"op": "toggle", "id": str(open_task), "completed": True},
+    )
+    assert results == [("toggle", 200), ("toggle", 200)]
+
+    tasks = client.get(tasks_url, headers={**user["headers"], "If-None-Match": tasks_etag})
+    goals = client.get("/planner/goals", headers={**user["headers"], "If-None-Match": goals_etag})
+    assert tasks.status_code == 200
+    assert goals.status_code == 200
+    assert {task["id"]: task["completed"] for task in tasks.json()["items"]} == {
+        str(done): False, str(open_task): True
+    }